@@ -5,35 +5,68 @@ This module provides a complete FastAPI server implementation that wraps the Goo
 Image Generation API with proper validation, error handling, and documentation.
 
 Usage:
-    pip install fastapi uvicorn python-multipart google-genai pillow
+    pip install fastapi uvicorn python-multipart google-genai pillow orjson uvloop httptools
     uvicorn fastapi_implementation:app --reload
+
+    For production run `python fastapi_implementation.py`, which serves with uvloop and
+    httptools. Set WORKERS (typically 2 * CPU cores + 1) to run several worker processes,
+    and set REDIS_URL (and pip install redis) so chat sessions are shared between them.
+    Installing PyTurboJPEG (libjpeg-turbo) speeds up JPEG uploads, and pillow-simd can
+    replace pillow as a drop-in for the other formats.
 """
 
 import os
 import io
+import inspect
+import json
 import base64
 import uuid
 import asyncio
+import weakref
+import tempfile
+import hashlib
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Union
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Union, Final, Mapping
 from enum import Enum
 from contextlib import asynccontextmanager
 
+import anyio.to_thread
+import orjson
 import uvicorn
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, validator
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 from PIL import Image
 import google.genai as genai
 from google.genai import types
 
+try:
+    # Optional SIMD JPEG decoder; falls back to Pillow when unavailable
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _turbojpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbojpeg = None
+
 # Initialize Gemini client
 security = HTTPBearer()
 
-# In-memory storage for chat sessions (use Redis/database in production)
-chat_sessions: Dict[str, Any] = {}
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson (FastAPI's own class is deprecated in recent releases)."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+# Shared Gemini client, created once in lifespan and reused by every request
+gemini_client: Optional[genai.Client] = None
 
 # Configuration
 class Settings:
@@ -41,17 +74,200 @@ class Settings:
     DEFAULT_MODEL = "gemini-2.5-flash-image-preview"
     MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
     MAX_PROMPT_LENGTH = 2000
+    MAX_IMAGE_PIXELS = 50_000_000
+    DECODE_MAX_SIZE = (2048, 2048)  # JPEGs larger than this are decoded at reduced scale
+    UPLOAD_CHUNK_SIZE = 1 << 16  # 64KB
+    UPLOAD_SPOOL_SIZE = 2 * 1024 * 1024  # Spill uploads to disk above 2MB
+    RESPONSE_CACHE_SIZE = 256
+    RESPONSE_CACHE_TTL = 60 * 60  # 1 hour
+    FILE_REF_TTL = 47 * 60 * 60  # Gemini deletes uploaded files after 48 hours
+    FILE_REF_PURGE_INTERVAL = 10 * 60
+    STORY_MAX_PARALLEL = 8  # Concurrent generations per story, bounded by API quota
+    REDIS_URL = os.getenv("REDIS_URL")
+    CHAT_SESSION_TTL = 24 * 60 * 60  # 24 hours
+    THREAD_POOL_SIZE = 64  # Worker threads for blocking image decode/encode
+    ID_BATCH_SIZE = 256  # Ids minted per os.urandom call
 
 settings = Settings()
 
+# Refuse decompression bombs before any pixel data is decoded
+Image.MAX_IMAGE_PIXELS = settings.MAX_IMAGE_PIXELS
+
+CHAT_CONFIG = types.GenerateContentConfig(
+    response_modalities=['Text', 'Image'],
+    temperature=1.0
+)
+
+# Chat session storage
+class InMemorySessionStore:
+    """Process-local chat session store, suitable for a single worker."""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._sessions: Dict[str, tuple] = {}
+    
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._sessions.get(session_id)
+        if entry is None or entry[0] < time.monotonic():
+            self._sessions.pop(session_id, None)
+            return None
+        return dict(entry[1])
+    
+    async def put(self, session_id: str, state: Dict[str, Any]):
+        """Create a session with the given state."""
+        self._sessions[session_id] = (time.monotonic() + self.ttl, {**state, 'version': 0})
+    
+    async def commit(self, session_id: str, version: int, history: List[Dict[str, Any]],
+                     context_length: int = 0) -> Optional[bool]:
+        """Store a message's history if the session is still at `version`.
+        
+        Returns None when the session has expired, False when another message committed first.
+        """
+        entry = self._sessions.get(session_id)
+        if entry is None or entry[0] < time.monotonic():
+            self._sessions.pop(session_id, None)
+            return None
+        state = entry[1]
+        if state['version'] != version:
+            return False
+        self._sessions[session_id] = (time.monotonic() + self.ttl, {
+            **state,
+            'history': history,
+            'message_count': state['message_count'] + 1,
+            'context_length': state['context_length'] + context_length,
+            'version': version + 1
+        })
+        return True
+    
+    async def close(self):
+        self._sessions.clear()
+
+class RedisSessionStore:
+    """Chat session store backed by Redis hashes so any worker can serve any session."""
+    
+    # Check the version and apply the whole update in one step, so a concurrent
+    # message or an expiry in between cannot leave a lost or partial session
+    COMMIT_SCRIPT = """
+    local version = redis.call('HGET', KEYS[1], 'version')
+    if not version then return -1 end
+    if tonumber(version) ~= tonumber(ARGV[1]) then return 0 end
+    redis.call('HSET', KEYS[1], 'history', ARGV[2], 'version', tonumber(version) + 1)
+    redis.call('HINCRBY', KEYS[1], 'message_count', 1)
+    redis.call('HINCRBY', KEYS[1], 'context_length', ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return 1
+    """
+    
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis
+        
+        self.ttl = ttl
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._commit = self._redis.register_script(self.COMMIT_SCRIPT)
+    
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"chat_session:{session_id}"
+    
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        fields = await self._redis.hgetall(self._key(session_id))
+        if not fields:
+            return None
+        
+        return {
+            'model': fields['model'],
+            'created_at': datetime.fromisoformat(fields['created_at']),
+            'message_count': int(fields['message_count']),
+            'context_length': int(fields['context_length']),
+            'history': json.loads(fields['history']),
+            'version': int(fields['version'])
+        }
+    
+    async def put(self, session_id: str, state: Dict[str, Any]):
+        """Create a session with the given state."""
+        fields = {'version': 0}
+        for name, value in state.items():
+            if name == 'history':
+                value = json.dumps(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            fields[name] = value
+        
+        key = self._key(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+    
+    async def commit(self, session_id: str, version: int, history: List[Dict[str, Any]],
+                     context_length: int = 0) -> Optional[bool]:
+        """Store a message's history if the session is still at `version`.
+        
+        Returns None when the session has expired, False when another message committed first.
+        """
+        status = await self._commit(
+            keys=[self._key(session_id)],
+            args=[version, json.dumps(history), context_length, self.ttl]
+        )
+        return None if status == -1 else bool(status)
+    
+    async def close(self):
+        await self._redis.aclose()
+
+if settings.REDIS_URL:
+    session_store = RedisSessionStore(settings.REDIS_URL, settings.CHAT_SESSION_TTL)
+else:
+    session_store = InMemorySessionStore(settings.CHAT_SESSION_TTL)
+
+# Messages to one chat are handled in order within a worker; the lock goes away with its last waiter
+_session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def session_lock(session_id: str) -> asyncio.Lock:
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+# Id generation
+_id_ring: deque = deque()
+
+def next_uuid() -> str:
+    """Return a random UUID4 string, drawing entropy in batches to amortize os.urandom."""
+    if not _id_ring:
+        entropy = os.urandom(16 * settings.ID_BATCH_SIZE)
+        _id_ring.extend(
+            str(uuid.UUID(bytes=entropy[i:i + 16], version=4))
+            for i in range(0, len(entropy), 16)
+        )
+    return _id_ring.popleft()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global gemini_client
+    
     # Initialize Gemini client on startup
     if not settings.GOOGLE_API_KEY:
         raise ValueError("GOOGLE_API_KEY environment variable is required")
     
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
+    # Size the thread pools that take PIL work off the event loop
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=settings.THREAD_POOL_SIZE))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREAD_POOL_SIZE
+    
+    # One client per process, shared by every endpoint
+    gemini_client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+    app.state.genai_client = gemini_client
+    
+    # Fail fast on a bad key instead of on the first request
+    await gemini_client.aio.models.list(config={'page_size': 1})
+    
+    purge_task = asyncio.create_task(purge_expired_file_refs())
     yield
+    purge_task.cancel()
+    
+    # Release the pooled HTTP connections
+    await session_store.close()
+    await gemini_client.aio.aclose()
+    gemini_client.close()
 
 app = FastAPI(
     title="Google Gemini Image Generation API",
@@ -59,6 +275,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -71,6 +288,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class RequestIDMiddleware(BaseHTTPMiddleware):
+    """Stamp each request with one id shared by handlers, logs and the response."""
+    
+    async def dispatch(self, request: Request, call_next):
+        request_id = next_uuid()
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+app.add_middleware(RequestIDMiddleware)
+
 # Enums
 class ResponseModality(str, Enum):
     TEXT = "Text"
@@ -108,7 +337,65 @@ class Direction(str, Enum):
     RIGHT = "right"
     ALL = "all"
 
+# Prompt fragments
+STYLE_INSTRUCTIONS: Final[Mapping[CompositionStyle, str]] = MappingProxyType({
+    CompositionStyle.BLEND: "seamlessly blend the elements together",
+    CompositionStyle.REPLACE: "replace elements from one image with another",
+    CompositionStyle.OVERLAY: "overlay elements maintaining distinct layers",
+    CompositionStyle.MONTAGE: "create an artistic montage composition"
+})
+
+STYLE_DESCRIPTIONS: Final[Mapping[StyleType, str]] = MappingProxyType({
+    StyleType.VAN_GOGH: "Vincent van Gogh's post-impressionist style with bold brushstrokes and vibrant colors",
+    StyleType.PICASSO: "Pablo Picasso's cubist style with geometric forms and multiple perspectives",
+    StyleType.MONET: "Claude Monet's impressionist style with soft brushwork and light effects",
+    StyleType.DIGITAL_ART: "modern digital art style with clean lines and vibrant colors",
+    StyleType.ANIME: "Japanese anime/manga art style",
+    StyleType.OIL_PAINTING: "classical oil painting technique",
+    StyleType.WATERCOLOR: "watercolor painting technique with soft, flowing colors",
+    StyleType.PHOTOGRAPHIC: "photorealistic style",
+    StyleType.MINIMALIST: "minimalist art style with simple forms and limited colors",
+    StyleType.ABSTRACT: "abstract art style with non-representational forms"
+})
+
+@lru_cache(maxsize=256)
+def build_style_prompt(style: Optional[StyleType], style_strength: float, preserve_content: bool) -> str:
+    """Build the style transfer prompt; without a style the second image is the reference."""
+    if style is None:
+        prompt = f"Apply the artistic style from the second image to the first image with {style_strength} strength."
+    else:
+        prompt = f"Apply {STYLE_DESCRIPTIONS[style]} to this image with {style_strength} strength."
+    
+    if preserve_content:
+        prompt += " Preserve the original content structure and composition."
+    return prompt
+
 # Request Models
+def form_model(cls):
+    """Let a request model be filled from multipart form fields via Depends(cls.as_form)."""
+    parameters = [
+        inspect.Parameter(
+            name,
+            inspect.Parameter.KEYWORD_ONLY,
+            default=Form(... if field.is_required() else field.default, description=field.description),
+            annotation=field.annotation
+        )
+        for name, field in cls.model_fields.items()
+    ]
+    
+    async def as_form(**data) -> cls:
+        try:
+            return cls(**data)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+    
+    as_form.__signature__ = inspect.Signature(parameters)
+    cls.as_form = staticmethod(as_form)
+    return cls
+
+class FormRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
 class TextToImageRequest(BaseModel):
     prompt: str = Field(..., min_length=10, max_length=2000, description="Detailed text description for image generation")
     model: str = Field(default=settings.DEFAULT_MODEL, description="Gemini model to use")
@@ -117,13 +404,15 @@ class TextToImageRequest(BaseModel):
     top_k: Optional[int] = Field(default=40, ge=1, le=100, description="Limits token selection")
     top_p: Optional[float] = Field(default=0.95, ge=0.0, le=1.0, description="Nucleus sampling threshold")
 
-class ImageEditRequest(BaseModel):
+@form_model
+class ImageEditRequest(FormRequest):
     prompt: str = Field(..., min_length=5, max_length=1000, description="Instructions for editing the image")
     model: str = Field(default=settings.DEFAULT_MODEL)
     preserve_subject: bool = Field(default=True, description="Whether to preserve the main subject")
     edit_strength: float = Field(default=0.8, ge=0.1, le=1.0, description="Strength of the editing effect")
 
-class MultiImageRequest(BaseModel):
+@form_model
+class MultiImageRequest(FormRequest):
     prompt: str = Field(..., min_length=10, max_length=1000, description="Instructions for combining images")
     model: str = Field(default=settings.DEFAULT_MODEL)
     composition_style: CompositionStyle = Field(default=CompositionStyle.BLEND, description="Style of composition")
@@ -132,7 +421,8 @@ class ChatCreateRequest(BaseModel):
     model: str = Field(default=settings.DEFAULT_MODEL)
     system_prompt: Optional[str] = Field(None, description="Initial system instructions")
 
-class ChatMessageRequest(BaseModel):
+@form_model
+class ChatMessageRequest(FormRequest):
     message: str = Field(..., min_length=1, max_length=1000, description="Text message or instruction")
     continue_generation: bool = Field(default=True, description="Whether to continue from previous generation")
 
@@ -143,18 +433,21 @@ class StoryGenerationRequest(BaseModel):
     style: Optional[str] = Field(None, description="Visual style for the sequence")
     model: str = Field(default=settings.DEFAULT_MODEL)
 
-class InpaintRequest(BaseModel):
+@form_model
+class InpaintRequest(FormRequest):
     prompt: str = Field(..., description="Description of what to paint in the region")
     region_description: Optional[str] = Field(None, description="Natural language description of the region")
     model: str = Field(default=settings.DEFAULT_MODEL)
 
-class OutpaintRequest(BaseModel):
+@form_model
+class OutpaintRequest(FormRequest):
     prompt: str = Field(..., description="Description of how to extend the image")
-    direction: List[Direction] = Field(..., min_items=1, description="Directions to extend the image")
+    direction: List[Direction] = Field(..., min_length=1, description="Directions to extend the image")
     extension_ratio: float = Field(default=0.5, ge=0.1, le=2.0, description="How much to extend")
     model: str = Field(default=settings.DEFAULT_MODEL)
 
-class StyleTransferRequest(BaseModel):
+@form_model
+class StyleTransferRequest(FormRequest):
     style: Optional[StyleType] = Field(None, description="Predefined style name")
     style_strength: float = Field(default=0.8, ge=0.1, le=1.0, description="Strength of style application")
     preserve_content: bool = Field(default=True, description="Whether to preserve original content structure")
@@ -186,10 +479,7 @@ class StoryMetadata(BaseModel):
     content_type: str
     generation_time: float
     total_tokens: int
-
-class StoryGenerationResponse(BaseModel):
-    images: List[StoryImage]
-    story_metadata: StoryMetadata
+    failed_sequence_numbers: List[int] = Field(default=[], description="Images that could not be generated")
 
 class ChatSession(BaseModel):
     session_id: str = Field(..., description="Unique session identifier")
@@ -217,46 +507,236 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)
     
     return credentials.credentials
 
-def validate_image_file(file: UploadFile) -> Image.Image:
-    """Validate and convert uploaded file to PIL Image."""
-    if file.size > settings.MAX_FILE_SIZE:
+async def validate_image_file(file: UploadFile) -> Image.Image:
+    """Stream uploaded file into a size-bounded spool and convert it to PIL Image."""
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
         raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE} bytes")
     
     if not file.content_type or not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    try:
-        image = Image.open(io.BytesIO(file.file.read()))
-        if image.mode == 'RGBA':
-            # Convert RGBA to RGB with white background
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[-1])
-            image = background
-        elif image.mode != 'RGB':
-            image = image.convert('RGB')
+    with tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_SIZE) as spool:
+        # Reject oversized uploads as soon as the limit is crossed
+        total = 0
+        digest = hashlib.sha256()
+        while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+            total += len(chunk)
+            if total > settings.MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE} bytes")
+            digest.update(chunk)
+            spool.write(chunk)
+        spool.seek(0)
         
-        return image
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
+        try:
+            # Decode in a worker thread so large images do not stall the event loop
+            return await asyncio.to_thread(decode_image_file, spool, digest.hexdigest())
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
+
+def decode_image_file(fp, digest: str) -> Image.Image:
+    """Decode an image file object to RGB, tagging it with its content hash."""
+    image = None
+    if _turbojpeg is not None:
+        # Go by the JPEG SOI marker, not the content type the client declared
+        is_jpeg = fp.read(2) == b'\xff\xd8'
+        fp.seek(0)
+        if is_jpeg:
+            try:
+                image = decode_jpeg_turbo(fp.read())
+            except Exception:
+                # e.g. CMYK/YCCK JPEGs, which libjpeg-turbo cannot convert to RGB; Pillow can
+                fp.seek(0)
+    if image is None:
+        image = Image.open(fp)
+        # Let libjpeg decode straight to RGB, DCT-scaling oversized JPEGs on the way
+        image.draft('RGB', settings.DECODE_MAX_SIZE)
+        image.load()
+    if image.mode == 'RGBA':
+        # Composite onto white in one pass, using the image's own alpha as mask
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image)
+        del image
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    
+    # Content hash of the upload, reused as cache and Files API key
+    image.info['sha256'] = digest
+    return image
+
+def decode_jpeg_turbo(data: bytes) -> Image.Image:
+    """Decode JPEG bytes to an RGB PIL Image with libjpeg-turbo."""
+    width, height, _, _ = _turbojpeg.decode_header(data)
+    # Same DCT scaling as Pillow's draft(): smallest factor still covering the target size
+    max_width, max_height = settings.DECODE_MAX_SIZE
+    scale = 1
+    while scale < 8 and width // (scale * 2) >= max_width and height // (scale * 2) >= max_height:
+        scale *= 2
+    pixels = _turbojpeg.decode(data, pixel_format=TJPF_RGB, scaling_factor=(1, scale))
+    return Image.fromarray(pixels)
+
+def image_digest(image: Image.Image) -> str:
+    """Return the content hash recorded at upload, hashing the pixels if missing."""
+    digest = image.info.get('sha256')
+    if digest is None:
+        digest = hashlib.sha256(f"{image.mode}|{image.size}|".encode() + image.tobytes()).hexdigest()
+        image.info['sha256'] = digest
+    return digest
+
+def encode_png(image: Image.Image) -> bytes:
+    """Encode PIL Image as PNG bytes."""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
 
 def image_to_base64(image: Image.Image) -> str:
     """Convert PIL Image to base64 string."""
+    return base64.b64encode(encode_png(image)).decode()
+
+def inline_image_to_base64(inline_data: types.Blob) -> str:
+    """Convert inline image data to base64, re-encoding only when it is not PNG."""
+    if inline_data.mime_type == 'image/png':
+        return base64.b64encode(inline_data.data).decode()
+    
+    image = Image.open(io.BytesIO(inline_data.data))
     buffer = io.BytesIO()
-    image.save(buffer, format='PNG')
+    image.save(buffer, format='PNG', optimize=False, compress_level=1)
     return base64.b64encode(buffer.getvalue()).decode()
 
+async def extract_response_content(response) -> Dict[str, List[str]]:
+    """Collect text parts and base64-encoded images from a Gemini response."""
+    texts = []
+    blobs = []
+    for part in response.candidates[0].content.parts:
+        if hasattr(part, 'text') and part.text:
+            texts.append(part.text)
+        elif part.inline_data is not None:
+            blobs.append(part.inline_data)
+    
+    images = await asyncio.gather(*(asyncio.to_thread(inline_image_to_base64, blob) for blob in blobs))
+    return {'text': texts, 'images': list(images)}
+
+class ResponseCache:
+    """Bounded LRU cache of generation results with per-entry expiry."""
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+    
+    @staticmethod
+    def make_key(model: str, prompt: str, images: Optional[List[Image.Image]] = None) -> bytes:
+        """Hash the model, prompt and input pixels into a cache key."""
+        digest = hashlib.sha256(f"{model}|{prompt}".encode())
+        for image in images or []:
+            digest.update(f"|{image_digest(image)}".encode())
+        return digest.digest()
+    
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def put(self, key: bytes, value: Dict[str, Any]):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+
+class FileRefCache:
+    """Map image content hashes to uploaded Gemini file handles until they expire."""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._refs: Dict[str, tuple] = {}
+    
+    def get(self, digest: str) -> Optional[types.File]:
+        entry = self._refs.get(digest)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+    
+    def put(self, digest: str, ref: types.File):
+        self._refs[digest] = (time.monotonic() + self.ttl, ref)
+    
+    def purge_expired(self) -> int:
+        """Drop expired handles and return how many were removed."""
+        now = time.monotonic()
+        expired = [digest for digest, (expires_at, _) in self._refs.items() if expires_at < now]
+        for digest in expired:
+            del self._refs[digest]
+        return len(expired)
+
+file_refs = FileRefCache(settings.FILE_REF_TTL)
+
+async def upload_bytes_to_gemini(data: bytes, mime_type: str, digest: Optional[str] = None) -> types.File:
+    """Upload raw file bytes through the Files API once and reuse the handle afterwards."""
+    digest = digest or hashlib.sha256(data).hexdigest()
+    ref = file_refs.get(digest)
+    if ref is not None:
+        return ref
+    
+    ref = await gemini_client.aio.files.upload(
+        file=io.BytesIO(data),
+        config=types.UploadFileConfig(mime_type=mime_type, display_name=digest)
+    )
+    file_refs.put(digest, ref)
+    return ref
+
+async def upload_image_to_gemini(image: Image.Image) -> types.File:
+    """Upload image through the Files API once and reuse the handle afterwards."""
+    digest = image_digest(image)
+    ref = file_refs.get(digest)
+    if ref is not None:
+        return ref
+    
+    data = await asyncio.to_thread(encode_png, image)
+    return await upload_bytes_to_gemini(data, 'image/png', digest)
+
+async def serialize_history(history: List[types.Content]) -> List[Dict[str, Any]]:
+    """Convert chat history to JSON-safe dicts, moving inline images to the Files API."""
+    serialized = []
+    for content in history:
+        parts = []
+        for part in content.parts or []:
+            if part.inline_data is not None:
+                ref = await upload_bytes_to_gemini(part.inline_data.data, part.inline_data.mime_type)
+                part = types.Part.from_uri(file_uri=ref.uri, mime_type=ref.mime_type)
+            parts.append(part.model_dump(mode='json', exclude_none=True))
+        serialized.append({'role': content.role, 'parts': parts})
+    return serialized
+
+async def purge_expired_file_refs():
+    """Periodically forget file handles that Gemini has already deleted."""
+    while True:
+        await asyncio.sleep(settings.FILE_REF_PURGE_INTERVAL)
+        file_refs.purge_expired()
+
 async def generate_with_gemini(prompt: str, images: Optional[List[Image.Image]] = None, model: str = settings.DEFAULT_MODEL) -> Dict[str, Any]:
     """Generate content using Gemini API."""
+    cache_key = ResponseCache.make_key(model, prompt, images)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return {'text': list(cached['text']), 'images': list(cached['images'])}
+    
     try:
-        client = genai.Client(api_key=settings.GOOGLE_API_KEY)
-        
-        # Prepare content
+        # Prepare content, referencing images by their uploaded file handles
         content_parts = [prompt]
         if images:
-            content_parts.extend(images)
+            content_parts.extend([await upload_image_to_gemini(image) for image in images])
         
-        # Generate content
-        response = client.models.generate_content(
+        # Generate content without blocking the event loop
+        response = await gemini_client.aio.models.generate_content(
             model=model,
             contents=content_parts,
             config=types.GenerateContentConfig(
@@ -266,26 +746,41 @@ async def generate_with_gemini(prompt: str, images: Optional[List[Image.Image]]
         )
         
         # Process response
-        result = {
-            'text': [],
-            'images': [],
-            'raw_response': response
-        }
-        
-        for part in response.candidates[0].content.parts:
-            if hasattr(part, 'text') and part.text:
-                result['text'].append(part.text)
-            elif hasattr(part, 'inline_data'):
-                # Convert binary data to PIL Image and then to base64
-                image_data = part.inline_data.data
-                image = Image.open(io.BytesIO(image_data))
-                result['images'].append(image_to_base64(image))
+        result = await extract_response_content(response)
         
+        # Only cache successful generations so blocked or empty replies get retried
+        if result['images']:
+            response_cache.put(cache_key, {'text': result['text'], 'images': result['images']})
         return result
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
 
+class RequestCoalescer:
+    """Share a single in-flight Gemini call between identical concurrent requests."""
+    
+    def __init__(self):
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+    
+    async def submit(self, key: tuple, call) -> Dict[str, Any]:
+        """Await the pending call for key, starting it with call() if none is running."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        
+        # Shield so one disconnecting client does not cancel the call for the others
+        return await asyncio.shield(future)
+    
+    def _finish(self, key: tuple, future: asyncio.Future):
+        """Drop a finished call and retrieve its exception, since every waiter may have gone."""
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            future.exception()
+
+coalescer = RequestCoalescer()
+
 def create_metadata(response_data: Dict[str, Any], generation_time: float, model: str) -> ImageMetadata:
     """Create metadata from response."""
     return ImageMetadata(
@@ -297,6 +792,18 @@ def create_metadata(response_data: Dict[str, Any], generation_time: float, model
         image_dimensions={"width": 1024, "height": 1024} if response_data.get('images') else None
     )
 
+def build_sequence_prompt(request: StoryGenerationRequest, index: int) -> str:
+    """Create the prompt for one image of a story sequence."""
+    return f"""
+            {request.description}
+            
+            This is image {index+1} of {request.num_images} in the sequence.
+            {f'Style: {request.style}' if request.style else ''}
+            
+            Focus on the {'beginning' if index == 0 else 'middle' if index < request.num_images-1 else 'conclusion'} 
+            part of the story/sequence.
+            """
+
 # API Endpoints
 @app.post("/generate-image", response_model=ImageGenerationResponse, tags=["text-to-image"])
 async def generate_image(
@@ -304,11 +811,14 @@ async def generate_image(
     api_key: str = Depends(verify_api_key)
 ):
     """Generate image from text description."""
-    start_time = asyncio.get_event_loop().time()
+    start_time = time.perf_counter()
     
     try:
-        result = await generate_with_gemini(request.prompt, model=request.model)
-        generation_time = asyncio.get_event_loop().time() - start_time
+        key = (request.model, request.prompt, request.temperature, request.top_k, request.top_p)
+        result = await coalescer.submit(
+            key, lambda: generate_with_gemini(request.prompt, model=request.model)
+        )
+        generation_time = time.perf_counter() - start_time
         
         return ImageGenerationResponse(
             text=result['text'],
@@ -321,33 +831,30 @@ async def generate_image(
 
 @app.post("/edit-image", response_model=ImageGenerationResponse, tags=["image-editing"])
 async def edit_image(
-    prompt: str = Form(...),
+    form: ImageEditRequest = Depends(ImageEditRequest.as_form),
     image: UploadFile = File(...),
-    model: str = Form(default=settings.DEFAULT_MODEL),
-    preserve_subject: bool = Form(default=True),
-    edit_strength: float = Form(default=0.8),
     api_key: str = Depends(verify_api_key)
 ):
     """Edit existing image with text instructions."""
-    start_time = asyncio.get_event_loop().time()
+    start_time = time.perf_counter()
     
     # Validate image
-    pil_image = validate_image_file(image)
+    pil_image = await validate_image_file(image)
     
     # Create editing prompt
-    if preserve_subject:
-        full_prompt = f"{prompt}. Preserve the main subject exactly as it is."
+    if form.preserve_subject:
+        full_prompt = f"{form.prompt}. Preserve the main subject exactly as it is."
     else:
-        full_prompt = prompt
+        full_prompt = form.prompt
     
     try:
-        result = await generate_with_gemini(full_prompt, [pil_image], model=model)
-        generation_time = asyncio.get_event_loop().time() - start_time
+        result = await generate_with_gemini(full_prompt, [pil_image], model=form.model)
+        generation_time = time.perf_counter() - start_time
         
         return ImageGenerationResponse(
             text=result['text'],
             images=result['images'],
-            metadata=create_metadata(result, generation_time, model)
+            metadata=create_metadata(result, generation_time, form.model)
         )
     
     except Exception as e:
@@ -355,14 +862,12 @@ async def edit_image(
 
 @app.post("/compose-images", response_model=ImageGenerationResponse, tags=["multi-image"])
 async def compose_images(
-    prompt: str = Form(...),
+    form: MultiImageRequest = Depends(MultiImageRequest.as_form),
     images: List[UploadFile] = File(...),
-    model: str = Form(default=settings.DEFAULT_MODEL),
-    composition_style: CompositionStyle = Form(default=CompositionStyle.BLEND),
     api_key: str = Depends(verify_api_key)
 ):
     """Combine multiple images into new compositions."""
-    start_time = asyncio.get_event_loop().time()
+    start_time = time.perf_counter()
     
     # Validate image count
     if len(images) < 2:
@@ -372,26 +877,19 @@ async def compose_images(
         )
     
     # Validate and process images
-    pil_images = [validate_image_file(img) for img in images]
+    pil_images = [await validate_image_file(img) for img in images]
     
     # Enhance prompt with composition style
-    style_instructions = {
-        CompositionStyle.BLEND: "seamlessly blend the elements together",
-        CompositionStyle.REPLACE: "replace elements from one image with another",
-        CompositionStyle.OVERLAY: "overlay elements maintaining distinct layers",
-        CompositionStyle.MONTAGE: "create an artistic montage composition"
-    }
-    
-    full_prompt = f"{prompt}. {style_instructions[composition_style]}."
+    full_prompt = f"{form.prompt}. {STYLE_INSTRUCTIONS[form.composition_style]}."
     
     try:
-        result = await generate_with_gemini(full_prompt, pil_images, model=model)
-        generation_time = asyncio.get_event_loop().time() - start_time
+        result = await generate_with_gemini(full_prompt, pil_images, model=form.model)
+        generation_time = time.perf_counter() - start_time
         
         return ImageGenerationResponse(
             text=result['text'],
             images=result['images'],
-            metadata=create_metadata(result, generation_time, model)
+            metadata=create_metadata(result, generation_time, form.model)
         )
     
     except Exception as e:
@@ -403,31 +901,22 @@ async def create_chat(
     api_key: str = Depends(verify_api_key)
 ):
     """Create a new chat session for iterative image generation."""
-    session_id = str(uuid.uuid4())
+    session_id = next_uuid()
+    created_at = datetime.now()
     
-    # Initialize chat with Gemini
     try:
-        client = genai.Client(api_key=settings.GOOGLE_API_KEY)
-        chat = client.chats.create(
-            model=request.model,
-            config=types.GenerateContentConfig(
-                response_modalities=['Text', 'Image'],
-                temperature=1.0
-            )
-        )
-        
-        # Store session
-        chat_sessions[session_id] = {
-            'chat': chat,
+        # Store session; the Gemini chat is rebuilt from history on each message
+        await session_store.put(session_id, {
             'model': request.model,
-            'created_at': datetime.now(),
+            'created_at': created_at,
             'message_count': 0,
-            'context_length': 0
-        }
+            'context_length': 0,
+            'history': []
+        })
         
         return ChatSession(
             session_id=session_id,
-            created_at=datetime.now(),
+            created_at=created_at,
             model=request.model,
             message_count=0,
             context_length=0
@@ -439,140 +928,142 @@ async def create_chat(
 @app.post("/chat/{session_id}/message", response_model=ImageGenerationResponse, tags=["chat"])
 async def send_chat_message(
     session_id: str,
-    message: str = Form(...),
+    form: ChatMessageRequest = Depends(ChatMessageRequest.as_form),
     image: Optional[UploadFile] = File(None),
-    continue_generation: bool = Form(default=True),
     api_key: str = Depends(verify_api_key)
 ):
     """Send message to chat session."""
-    start_time = asyncio.get_event_loop().time()
+    start_time = time.perf_counter()
     
-    # Get session
-    if session_id not in chat_sessions:
-        raise HTTPException(status_code=404, detail="Chat session not found")
-    
-    session = chat_sessions[session_id]
-    
-    try:
-        # Prepare message content
-        content_parts = [message]
-        if image:
-            pil_image = validate_image_file(image)
-            content_parts.append(pil_image)
-        
-        # Send message to chat
-        response = session['chat'].send_message(content_parts)
-        
-        # Process response
-        result = {
-            'text': [],
-            'images': []
-        }
-        
-        for part in response.candidates[0].content.parts:
-            if hasattr(part, 'text') and part.text:
-                result['text'].append(part.text)
-            elif hasattr(part, 'inline_data'):
-                image_data = part.inline_data.data
-                pil_image = Image.open(io.BytesIO(image_data))
-                result['images'].append(image_to_base64(pil_image))
+    async with session_lock(session_id):
+        # Get session
+        session = await session_store.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Chat session not found")
         
-        # Update session
-        session['message_count'] += 1
-        session['context_length'] += len(message)
-        
-        generation_time = asyncio.get_event_loop().time() - start_time
+        try:
+            # Prepare message content
+            content_parts = [form.message]
+            if image:
+                pil_image = await validate_image_file(image)
+                content_parts.append(await upload_image_to_gemini(pil_image))
+            
+            # Rebuild the chat from stored history and send message
+            chat = gemini_client.aio.chats.create(
+                model=session['model'],
+                config=CHAT_CONFIG,
+                history=[types.Content.model_validate(content) for content in session['history']]
+            )
+            response = await chat.send_message(content_parts)
+            
+            # Process response
+            result = await extract_response_content(response)
+            
+            # Update session, unless it expired or another worker answered first
+            committed = await session_store.commit(
+                session_id, session['version'], await serialize_history(chat.get_history()), len(form.message)
+            )
         
-        return ImageGenerationResponse(
-            text=result['text'],
-            images=result['images'],
-            metadata=create_metadata(result, generation_time, session['model'])
-        )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    if committed is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    if not committed:
+        raise HTTPException(status_code=409, detail="Chat session was updated by another message; retry")
+    
+    generation_time = time.perf_counter() - start_time
+    
+    return ImageGenerationResponse(
+        text=result['text'],
+        images=result['images'],
+        metadata=create_metadata(result, generation_time, session['model'])
+    )
 
-@app.post("/story/generate", response_model=StoryGenerationResponse, tags=["story"])
+@app.post("/story/generate", response_class=StreamingResponse, tags=["story"])
 async def generate_story(
     request: StoryGenerationRequest,
     background_tasks: BackgroundTasks,
     api_key: str = Depends(verify_api_key)
 ):
-    """Generate sequential images for stories and tutorials."""
-    start_time = asyncio.get_event_loop().time()
+    """Generate sequential images for stories and tutorials.
     
-    try:
-        story_images = []
-        total_tokens = 0
+    Streams newline-delimited JSON: one StoryImage per line as each image completes,
+    followed by a final {"story_metadata": ...} line.
+    """
+    start_time = time.perf_counter()
+    
+    # Generate all images concurrently, bounded to respect API quota
+    semaphore = asyncio.Semaphore(settings.STORY_MAX_PARALLEL)
+    
+    async def generate_sequence_image(index: int):
+        async with semaphore:
+            try:
+                return index, await generate_with_gemini(build_sequence_prompt(request, index), model=request.model)
+            except Exception as e:
+                return index, e
+    
+    async def stream_story():
+        tasks = [asyncio.create_task(generate_sequence_image(i)) for i in range(request.num_images)]
+        total_images = 0
+        failed_sequence_numbers = []
         
-        # Generate each image in sequence
-        for i in range(request.num_images):
-            # Create sequence-specific prompt
-            sequence_prompt = f"""
-            {request.description}
-            
-            This is image {i+1} of {request.num_images} in the sequence.
-            {f'Style: {request.style}' if request.style else ''}
-            
-            Focus on the {'beginning' if i == 0 else 'middle' if i < request.num_images-1 else 'conclusion'} 
-            part of the story/sequence.
-            """
-            
-            # Generate image
-            result = await generate_with_gemini(sequence_prompt, model=request.model)
-            
-            if result['images']:
-                story_images.append(StoryImage(
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                i, result = await next_result
+                if isinstance(result, Exception) or not result['images']:
+                    failed_sequence_numbers.append(i + 1)
+                    continue
+                
+                story_image = StoryImage(
                     image=result['images'][0],
                     sequence_number=i + 1,
                     description=result['text'][0] if result['text'] else f"Scene {i+1}",
                     timestamp=datetime.now()
-                ))
+                )
+                total_images += 1
+                yield orjson.dumps(story_image.model_dump(mode='json')) + b"\n"
             
-            total_tokens += 1335  # Estimated tokens per image
-        
-        generation_time = asyncio.get_event_loop().time() - start_time
-        
-        return StoryGenerationResponse(
-            images=story_images,
-            story_metadata=StoryMetadata(
-                total_images=len(story_images),
+            story_metadata = StoryMetadata(
+                total_images=total_images,
                 content_type=request.content_type.value,
-                generation_time=generation_time,
-                total_tokens=total_tokens
+                generation_time=time.perf_counter() - start_time,
+                total_tokens=1335 * request.num_images,  # Estimated tokens per image
+                failed_sequence_numbers=sorted(failed_sequence_numbers)
             )
-        )
+            yield orjson.dumps({'story_metadata': story_metadata.model_dump(mode='json')}) + b"\n"
+        finally:
+            # Stop outstanding generations if the client disconnects
+            for task in tasks:
+                task.cancel()
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(stream_story(), media_type="application/x-ndjson")
 
 @app.post("/advanced/inpaint", response_model=ImageGenerationResponse, tags=["advanced"])
 async def inpaint_image(
-    prompt: str = Form(...),
+    form: InpaintRequest = Depends(InpaintRequest.as_form),
     image: UploadFile = File(...),
-    region_description: Optional[str] = Form(None),
-    model: str = Form(default=settings.DEFAULT_MODEL),
     api_key: str = Depends(verify_api_key)
 ):
     """Modify specific regions within an image."""
-    start_time = asyncio.get_event_loop().time()
+    start_time = time.perf_counter()
     
-    pil_image = validate_image_file(image)
+    pil_image = await validate_image_file(image)
     
     # Create inpainting prompt
-    if region_description:
-        full_prompt = f"In the region described as '{region_description}', {prompt}"
+    if form.region_description:
+        full_prompt = f"In the region described as '{form.region_description}', {form.prompt}"
     else:
-        full_prompt = f"Modify the specified area: {prompt}"
+        full_prompt = f"Modify the specified area: {form.prompt}"
     
     try:
-        result = await generate_with_gemini(full_prompt, [pil_image], model=model)
-        generation_time = asyncio.get_event_loop().time() - start_time
+        result = await generate_with_gemini(full_prompt, [pil_image], model=form.model)
+        generation_time = time.perf_counter() - start_time
         
         return ImageGenerationResponse(
             text=result['text'],
             images=result['images'],
-            metadata=create_metadata(result, generation_time, model)
+            metadata=create_metadata(result, generation_time, form.model)
         )
     
     except Exception as e:
@@ -580,34 +1071,31 @@ async def inpaint_image(
 
 @app.post("/advanced/outpaint", response_model=ImageGenerationResponse, tags=["advanced"])
 async def outpaint_image(
-    prompt: str = Form(...),
+    form: OutpaintRequest = Depends(OutpaintRequest.as_form),
     image: UploadFile = File(...),
-    direction: List[Direction] = Form(...),
-    extension_ratio: float = Form(default=0.5),
-    model: str = Form(default=settings.DEFAULT_MODEL),
     api_key: str = Depends(verify_api_key)
 ):
     """Extend image boundaries in specified directions."""
-    start_time = asyncio.get_event_loop().time()
+    start_time = time.perf_counter()
     
-    pil_image = validate_image_file(image)
+    pil_image = await validate_image_file(image)
     
     # Create outpainting prompt
-    direction_text = ', '.join([d.value for d in direction])
+    direction_text = ', '.join([d.value for d in form.direction])
     full_prompt = f"""
-    Extend this image in the {direction_text} direction(s) by {extension_ratio}x.
-    {prompt}
+    Extend this image in the {direction_text} direction(s) by {form.extension_ratio}x.
+    {form.prompt}
     Maintain visual consistency and style with the original image.
     """
     
     try:
-        result = await generate_with_gemini(full_prompt, [pil_image], model=model)
-        generation_time = asyncio.get_event_loop().time() - start_time
+        result = await generate_with_gemini(full_prompt, [pil_image], model=form.model)
+        generation_time = time.perf_counter() - start_time
         
         return ImageGenerationResponse(
             text=result['text'],
             images=result['images'],
-            metadata=create_metadata(result, generation_time, model)
+            metadata=create_metadata(result, generation_time, form.model)
         )
     
     except Exception as e:
@@ -615,92 +1103,89 @@ async def outpaint_image(
 
 @app.post("/advanced/style-transfer", response_model=ImageGenerationResponse, tags=["advanced"])
 async def style_transfer(
+    form: StyleTransferRequest = Depends(StyleTransferRequest.as_form),
     image: UploadFile = File(...),
-    style: Optional[StyleType] = Form(None),
     style_reference_image: Optional[UploadFile] = File(None),
-    style_strength: float = Form(default=0.8),
-    preserve_content: bool = Form(default=True),
-    model: str = Form(default=settings.DEFAULT_MODEL),
     api_key: str = Depends(verify_api_key)
 ):
     """Apply artistic styles to images."""
-    start_time = asyncio.get_event_loop().time()
+    start_time = time.perf_counter()
     
-    pil_image = validate_image_file(image)
+    pil_image = await validate_image_file(image)
     images = [pil_image]
     
     # Handle style reference image
     if style_reference_image:
-        style_image = validate_image_file(style_reference_image)
+        style_image = await validate_image_file(style_reference_image)
         images.append(style_image)
-        prompt = f"Apply the artistic style from the second image to the first image with {style_strength} strength."
-    elif style:
-        style_descriptions = {
-            StyleType.VAN_GOGH: "Vincent van Gogh's post-impressionist style with bold brushstrokes and vibrant colors",
-            StyleType.PICASSO: "Pablo Picasso's cubist style with geometric forms and multiple perspectives",
-            StyleType.MONET: "Claude Monet's impressionist style with soft brushwork and light effects",
-            StyleType.DIGITAL_ART: "modern digital art style with clean lines and vibrant colors",
-            StyleType.ANIME: "Japanese anime/manga art style",
-            StyleType.OIL_PAINTING: "classical oil painting technique",
-            StyleType.WATERCOLOR: "watercolor painting technique with soft, flowing colors",
-            StyleType.PHOTOGRAPHIC: "photorealistic style",
-            StyleType.MINIMALIST: "minimalist art style with simple forms and limited colors",
-            StyleType.ABSTRACT: "abstract art style with non-representational forms"
-        }
-        
-        prompt = f"Apply {style_descriptions[style]} to this image with {style_strength} strength."
+        prompt = build_style_prompt(None, form.style_strength, form.preserve_content)
+    elif form.style:
+        prompt = build_style_prompt(form.style, form.style_strength, form.preserve_content)
     else:
         raise HTTPException(status_code=400, detail="Must specify either style or style_reference_image")
     
-    if preserve_content:
-        prompt += " Preserve the original content structure and composition."
-    
     try:
-        result = await generate_with_gemini(prompt, images, model=model)
-        generation_time = asyncio.get_event_loop().time() - start_time
+        result = await generate_with_gemini(prompt, images, model=form.model)
+        generation_time = time.perf_counter() - start_time
         
         return ImageGenerationResponse(
             text=result['text'],
             images=result['images'],
-            metadata=create_metadata(result, generation_time, model)
+            metadata=create_metadata(result, generation_time, form.model)
         )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Health check endpoint
+_health_body = (0, b"")  # (epoch second, serialized body) shared by probes within that second
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.now()}
+    global _health_body
+    second = int(time.time())
+    if _health_body[0] != second:
+        _health_body = (second, orjson.dumps({"status": "healthy", "timestamp": datetime.now()}))
+    
+    return Response(content=_health_body[1], media_type="application/json")
 
 # Error handlers
+def get_request_id(request: Request) -> str:
+    """Return the id assigned by RequestIDMiddleware, minting one if it never ran."""
+    request_id = getattr(request.state, 'request_id', None)
+    if request_id is None:
+        request_id = request.state.request_id = next_uuid()
+    return request_id
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler."""
-    request_id = str(uuid.uuid4())
+    request_id = get_request_id(request)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": "http_error",
             "message": exc.detail,
             "request_id": request_id
-        }
+        },
+        headers={"X-Request-ID": request_id}
     )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """General exception handler."""
-    request_id = str(uuid.uuid4())
+    request_id = get_request_id(request)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "server_error",
             "message": "An internal server error occurred",
             "request_id": request_id
-        }
+        },
+        headers={"X-Request-ID": request_id}
     )
 
 if __name__ == "__main__":
@@ -708,6 +1193,8 @@ if __name__ == "__main__":
         "fastapi_implementation:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WORKERS", "1")),
         log_level="info"
     )
\ No newline at end of file
@@ -1,13 +1,23 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import os
 from datetime import datetime
+from functools import partial
 from PIL import Image
 
 # Import utilities
-from utils.api_client import get_client
+from utils.api_client import get_client, generate_many, run_parallel
+from utils.cached_api import cached_generate, cached_edit, clear_api_cache
+from utils.docs_content import DOC_EXAMPLE_PROMPTS, doc_expanders
+from utils.prompt_templates import (
+    EXAMPLE_PROMPTS, EDIT_EXAMPLES, COMPOSITION_EXAMPLES, QUICK_PROMPTS, STORY_TEMPLATES,
+    ADVANCED_PROMPT_TEMPLATES, build_advanced_prompt,
+    TEMPLATE_VAR_RE, TEMPLATES_DB, render_prompt
+)
 from utils.image_utils import (
-    display_response, create_image_upload_widget, init_image_session_state,
-    add_to_image_history, display_image_history, clear_image_history
+    display_response, create_image_upload_widget, get_upload_thumbnails, init_image_session_state,
+    add_to_image_history, add_many_to_image_history, display_image_history, clear_image_history,
+    prepare_for_api, encoded_image_bytes, make_thumbnail
 )
 
 # Page configuration
@@ -21,6 +31,20 @@ st.set_page_config(
 # Initialize session state
 init_image_session_state()
 
+
+def set_state(key: str, value):
+    """Button callback that sets a session state value before the rerun"""
+    st.session_state[key] = value
+
+
+def rerun_fragment():
+    """Rerun only the calling fragment, or the whole app during a full run"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
 # Sidebar
 with st.sidebar:
     st.title("🍌 Nano Banana")
@@ -44,6 +68,8 @@ with st.sidebar:
         
         if api_key_input:
             os.environ['GOOGLE_API_KEY'] = api_key_input
+            # Rebuild the shared client with the new key
+            get_client.clear()
             st.success("✅ API key set! Refresh the page.")
             st.rerun()
         
@@ -56,7 +82,11 @@ with st.sidebar:
     else:
         st.success("✅ API Key Configured")
         if st.button("🔄 Refresh Client"):
-            client.initialize_client()
+            get_client.clear()
+            client = get_client()
+    
+    # Checked once per run; the tabs and footer read this flag
+    client_ready = client.is_ready()
     
     st.divider()
     
@@ -77,6 +107,7 @@ with st.sidebar:
     with col2:
         if st.button("🗑️ Clear"):
             clear_image_history()
+            clear_api_cache()
             st.success("History cleared!")
 
 # Main app
@@ -88,23 +119,29 @@ if st.session_state.get('show_history', False):
     with st.expander("📸 Image Generation History", expanded=True):
         display_image_history()
 
-# Main tabs
-tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
+# Main tabs; only the selected one is built on each run
+TAB_NAMES = (
     "🎨 Text-to-Image",
-    "✏️ Image Editing", 
+    "✏️ Image Editing",
     "🖼️ Multi-Image",
     "💬 Chat Mode",
     "📚 Stories/Recipes",
     "🔧 Advanced Editing",
     "📝 Prompt Templates",
     "📖 Documentation"
-])
+)
+active_tab = st.radio("Section", TAB_NAMES, horizontal=True, label_visibility="collapsed", key="active_tab")
 
 # Tab 1: Text-to-Image Generation
-with tab1:
+@st.fragment
+def text_to_image_tab():
     st.header("🎨 Text-to-Image Generation")
     st.write("Generate high-quality images from text descriptions.")
     
+    if not client_ready:
+        st.info("🔑 Add your Google AI API key in the sidebar to use this tab.")
+        return
+    
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -114,46 +151,34 @@ with tab1:
             placeholder="A photorealistic image of a nano banana in a futuristic laboratory...",
             height=100,
             help="Be descriptive! Include details about style, lighting, composition, and mood."
-        )
+        ).strip()
         
         # Example prompts
         st.subheader("💡 Example Prompts")
-        example_prompts = {
-            "Photorealistic": "A photorealistic close-up of a nano banana on a marble kitchen counter, illuminated by soft natural light from a window, with water droplets on its surface",
-            "Artistic": "A minimalist digital art piece featuring a single nano banana floating in a vast white space, rendered in a modern abstract style",
-            "Fantasy": "A magical nano banana glowing with ethereal light in an enchanted forest, surrounded by fireflies and mystical fog",
-            "Product Shot": "A high-end product photograph of a nano banana on a sleek black surface with professional studio lighting and subtle reflections"
-        }
         
-        selected_example = st.selectbox("Choose an example:", ["Custom"] + list(example_prompts.keys()))
+        selected_example = st.selectbox("Choose an example:", ["Custom"] + list(EXAMPLE_PROMPTS.keys()))
         
         if selected_example != "Custom":
             if st.button(f"Use {selected_example} Example"):
-                st.session_state.text_to_image_prompt = example_prompts[selected_example]
-                st.rerun()
+                st.session_state.text_to_image_prompt = EXAMPLE_PROMPTS[selected_example]
         
         # Use example prompt if selected
         if 'text_to_image_prompt' in st.session_state:
             prompt = st.session_state.text_to_image_prompt
         
         # Generate button
-        if st.button("🎨 Generate Image", type="primary", disabled=not prompt.strip()):
-            if client.is_ready():
-                with st.spinner("Generating image..."):
-                    response = client.generate_image(prompt, model=model)
+        if st.button("🎨 Generate Image", type="primary", disabled=not prompt):
+            with st.spinner("Generating image..."):
+                response = cached_generate(prompt, model=model)
+                
+                if response:
+                    st.success("✅ Image generated successfully!")
+                    display_response(response)
                     
-                    if response:
-                        st.success("✅ Image generated successfully!")
-                        display_response(response)
-                        
-                        # Add to history
-                        if response.get('images'):
-                            for img in response['images']:
-                                add_to_image_history(img, prompt, "text-to-image")
-                    else:
-                        st.error("❌ Failed to generate image")
-            else:
-                st.error("❌ Client not ready. Check your API key.")
+                    # Add to history
+                    add_many_to_image_history(response.get('images'), prompt, "text-to-image")
+                else:
+                    st.error("❌ Failed to generate image")
     
     with col2:
         st.subheader("📋 Tips")
@@ -169,11 +194,17 @@ with tab1:
         "A photorealistic macro shot of a nano banana, captured with shallow depth of field, warm golden hour lighting, on a rustic wooden table"
         """)
 
+
 # Tab 2: Image Editing
-with tab2:
+@st.fragment
+def image_editing_tab():
     st.header("✏️ Image Editing")
     st.write("Upload an image and modify it with text prompts.")
     
+    if not client_ready:
+        st.info("🔑 Add your Google AI API key in the sidebar to use this tab.")
+        return
+    
     col1, col2 = st.columns([1, 1])
     
     with col1:
@@ -185,7 +216,8 @@ with tab2:
         )
         
         if uploaded_image:
-            st.image(uploaded_image, caption="Original Image", use_container_width=True)
+            for thumbnail in get_upload_thumbnails("image_edit_upload"):
+                st.image(thumbnail, caption="Original Image", use_container_width=True)
             
             # Image info
             st.write(f"Size: {uploaded_image.size[0]} x {uploaded_image.size[1]} pixels")
@@ -196,60 +228,60 @@ with tab2:
             "What would you like to change?",
             placeholder="Add a wizard hat to the subject, change the background to a magical forest...",
             height=100,
-            help="Describe the modifications you want to make"
-        )
+            help="Describe the modifications you want to make",
+            key="edit_prompt"
+        ).strip()
         
         # Common editing operations
         st.write("**Common Operations:**")
-        edit_examples = {
-            "Add Element": "Add a red hat to the person in the image",
-            "Change Background": "Change the background to a tropical beach scene",
-            "Change Style": "Transform this photo into a watercolor painting",
-            "Change Colors": "Change all blue elements to green",
-            "Remove Element": "Remove all text from this image",
-            "Change Expression": "Make the person smile more naturally"
-        }
-        
-        selected_edit = st.selectbox("Quick edits:", ["Custom"] + list(edit_examples.keys()))
-        if selected_edit != "Custom" and st.button(f"Use '{selected_edit}' Example"):
-            edit_prompt = edit_examples[selected_edit]
-            st.rerun()
+        
+        selected_edit = st.selectbox("Quick edits:", ["Custom"] + list(EDIT_EXAMPLES.keys()))
+        if selected_edit != "Custom":
+            st.button(f"Use '{selected_edit}' Example", on_click=set_state,
+                      args=("edit_prompt", EDIT_EXAMPLES[selected_edit]))
         
         # Edit button
-        if st.button("✏️ Edit Image", type="primary", disabled=not (uploaded_image and edit_prompt.strip())):
-            if client.is_ready():
-                with st.spinner("Editing image..."):
-                    response = client.edit_image(edit_prompt, uploaded_image, model=model)
+        if st.button("✏️ Edit Image", type="primary", disabled=not (uploaded_image and edit_prompt)):
+            with st.spinner("Editing image..."):
+                # Build the "before" preview while the API call is in flight
+                response, before_thumbnails = run_parallel(
+                    partial(cached_edit, edit_prompt, prepare_for_api(uploaded_image), model=model),
+                    partial(get_upload_thumbnails, "image_edit_upload", max_edge=512)
+                )
+                
+                if response:
+                    st.success("✅ Image edited successfully!")
                     
-                    if response:
-                        st.success("✅ Image edited successfully!")
-                        
-                        # Show before/after
-                        st.subheader("📊 Results")
-                        result_col1, result_col2 = st.columns(2)
-                        
-                        with result_col1:
-                            st.write("**Before:**")
-                            st.image(uploaded_image, use_container_width=True)
-                        
-                        with result_col2:
-                            st.write("**After:**")
-                            if response.get('images'):
-                                st.image(response['images'][0], use_container_width=True)
-                                add_to_image_history(response['images'][0], edit_prompt, "image-edit")
-                        
-                        # Display full response
-                        display_response(response)
-                    else:
-                        st.error("❌ Failed to edit image")
-            else:
-                st.error("❌ Client not ready. Check your API key.")
+                    # Show before/after
+                    st.subheader("📊 Results")
+                    result_col1, result_col2 = st.columns(2)
+                    
+                    with result_col1:
+                        st.write("**Before:**")
+                        st.image(before_thumbnails[0] if before_thumbnails else uploaded_image, use_container_width=True)
+                    
+                    with result_col2:
+                        st.write("**After:**")
+                        if response.get('images'):
+                            st.image(response['images'][0], use_container_width=True)
+                            add_to_image_history(response['images'][0], edit_prompt, "image-edit")
+                    
+                    # Display full response
+                    display_response(response)
+                else:
+                    st.error("❌ Failed to edit image")
+
 
 # Tab 3: Multi-Image Composition
-with tab3:
+@st.fragment
+def multi_image_tab():
     st.header("🖼️ Multi-Image Composition")
     st.write("Combine multiple images into new compositions or transfer styles.")
     
+    if not client_ready:
+        st.info("🔑 Add your Google AI API key in the sidebar to use this tab.")
+        return
+    
     col1, col2 = st.columns([1, 1])
     
     with col1:
@@ -263,8 +295,9 @@ with tab3:
         
         if uploaded_images:
             st.write(f"**Uploaded {len(uploaded_images)} image(s):**")
-            for i, img in enumerate(uploaded_images):
-                st.image(img, caption=f"Image {i+1}", width=200)
+            thumb_cols = st.columns(3)
+            for i, thumbnail in enumerate(get_upload_thumbnails("multi_image_upload", max_edge=256)):
+                thumb_cols[i % 3].image(thumbnail, caption=f"Image {i+1}", width=200)
     
     with col2:
         st.subheader("🎯 Composition Instructions")
@@ -272,49 +305,92 @@ with tab3:
             "How should the images be combined?",
             placeholder="Combine the person from image 1 with the background from image 2, make it look like a professional portrait...",
             height=120,
-            help="Describe how the images should be combined"
-        )
+            help="Describe how the images should be combined",
+            key="composition_prompt"
+        ).strip()
         
         # Composition examples
         st.write("**Composition Types:**")
-        comp_examples = {
-            "Subject Replacement": "Take the subject from image 1 and place them in the setting from image 2",
-            "Style Transfer": "Apply the artistic style from image 1 to the content of image 2",
-            "Background Swap": "Keep the subject from image 1 but use the background from image 2",
-            "Blend Elements": "Seamlessly blend elements from both images into a new scene",
-            "Product Mockup": "Place the product from image 1 onto the surface shown in image 2"
-        }
-        
-        selected_comp = st.selectbox("Composition type:", ["Custom"] + list(comp_examples.keys()))
-        if selected_comp != "Custom" and st.button(f"Use '{selected_comp}' Template"):
-            composition_prompt = comp_examples[selected_comp]
-            st.rerun()
+        
+        selected_comp = st.selectbox("Composition type:", ["Custom"] + list(COMPOSITION_EXAMPLES.keys()))
+        if selected_comp != "Custom":
+            st.button(f"Use '{selected_comp}' Template", on_click=set_state,
+                      args=("composition_prompt", COMPOSITION_EXAMPLES[selected_comp]))
         
         # Compose button
         if st.button("🖼️ Create Composition", type="primary", 
-                    disabled=not (uploaded_images and len(uploaded_images) >= 2 and composition_prompt.strip())):
-            if client.is_ready():
-                with st.spinner("Creating composition..."):
-                    response = client.edit_image(composition_prompt, uploaded_images, model=model)
+                    disabled=not (uploaded_images and len(uploaded_images) >= 2 and composition_prompt)):
+            with st.spinner("Creating composition..."):
+                response = cached_edit(composition_prompt, [prepare_for_api(img) for img in uploaded_images], model=model)
+                
+                if response:
+                    st.success("✅ Composition created successfully!")
+                    display_response(response)
                     
-                    if response:
-                        st.success("✅ Composition created successfully!")
-                        display_response(response)
-                        
-                        # Add to history
-                        if response.get('images'):
-                            for img in response['images']:
-                                add_to_image_history(img, composition_prompt, "multi-image")
-                    else:
-                        st.error("❌ Failed to create composition")
-            else:
-                st.error("❌ Client not ready. Check your API key.")
+                    # Add to history
+                    add_many_to_image_history(response.get('images'), composition_prompt, "multi-image")
+                else:
+                    st.error("❌ Failed to create composition")
+
 
 # Tab 4: Iterative Chat Mode
-with tab4:
+def send_chat(message: str):
+    """Send a message to the active chat session and record the reply"""
+    response = client.send_chat_message(st.session_state.chat_session, message)
+    if response:
+        # Encode the reply once so later reruns only replay stored bytes
+        images = []
+        for img in response.get('images') or []:
+            img_bytes = encoded_image_bytes(img)
+            images.append({'thumbnail': make_thumbnail(img_bytes, 512), 'png': img_bytes})
+        
+        # Add to chat history
+        st.session_state.chat_history.append({
+            'user': message,
+            'text': response.get('text') or [],
+            'images': images,
+            'timestamp': datetime.now()
+        })
+        
+        # Add images to history, reusing the bytes encoded above
+        add_many_to_image_history([image['png'] for image in images], message, "chat")
+        
+        rerun_fragment()
+
+
+def render_chat_entry(i: int, chat_entry: dict):
+    """Render one chat exchange from its precomputed text and image bytes"""
+    st.write(f"**You:** {chat_entry['user']}")
+    st.write(f"**Gemini:**")
+    for text_part in chat_entry['text']:
+        st.write(text_part)
+    
+    if chat_entry['images']:
+        cols = st.columns(min(len(chat_entry['images']), 3))
+        for j, image in enumerate(chat_entry['images']):
+            with cols[j % len(cols)]:
+                st.image(image['thumbnail'], use_container_width=True)
+                st.download_button(
+                    label="Download Image",
+                    data=image['png'],
+                    file_name=f"chat_{i + 1}_{j + 1}_{chat_entry['timestamp'].strftime('%Y%m%d_%H%M%S')}.png",
+                    mime="image/png",
+                    key=f"chat_{i}_download_{j}"
+                )
+    
+    st.write(f"*{chat_entry['timestamp'].strftime('%H:%M:%S')}*")
+    st.divider()
+
+
+@st.fragment
+def chat_tab():
     st.header("💬 Iterative Chat Mode")
     st.write("Have a conversation to progressively refine your images.")
     
+    if not client_ready:
+        st.info("🔑 Add your Google AI API key in the sidebar to use this tab.")
+        return
+    
     # Initialize chat session
     if 'chat_session' not in st.session_state:
         st.session_state.chat_session = None
@@ -327,18 +403,17 @@ with tab4:
         chat_col1, chat_col2 = st.columns([3, 1])
         with chat_col1:
             if st.button("🆕 Start New Chat Session", type="primary"):
-                if client.is_ready():
-                    st.session_state.chat_session = client.create_chat(model=model)
-                    st.session_state.chat_history = []
-                    st.success("New chat session started!")
-                    st.rerun()
+                st.session_state.chat_session = client.create_chat(model=model)
+                st.session_state.chat_history = []
+                st.success("New chat session started!")
+                rerun_fragment()
         
         with chat_col2:
             if st.button("🗑️ Clear Chat"):
                 st.session_state.chat_session = None
                 st.session_state.chat_history = []
                 st.success("Chat cleared!")
-                st.rerun()
+                rerun_fragment()
         
         # Chat interface
         if st.session_state.chat_session:
@@ -349,36 +424,17 @@ with tab4:
                 "Your message:",
                 placeholder="Create an image of a cat, then we can modify it...",
                 key="chat_message_input"
-            )
+            ).strip()
             
-            if st.button("💬 Send Message", disabled=not message.strip()):
+            if st.button("💬 Send Message", disabled=not message):
                 with st.spinner("Sending message..."):
-                    response = client.send_chat_message(st.session_state.chat_session, message)
-                    
-                    if response:
-                        # Add to chat history
-                        st.session_state.chat_history.append({
-                            'user': message,
-                            'assistant': response,
-                            'timestamp': datetime.now()
-                        })
-                        
-                        # Add images to history
-                        if response.get('images'):
-                            for img in response['images']:
-                                add_to_image_history(img, message, "chat")
-                        
-                        st.rerun()
+                    send_chat(message)
             
             # Display chat history
             st.subheader("💭 Conversation")
             for i, chat_entry in enumerate(st.session_state.chat_history):
                 with st.container():
-                    st.write(f"**You:** {chat_entry['user']}")
-                    st.write(f"**Gemini:**")
-                    display_response(chat_entry['assistant'])
-                    st.write(f"*{chat_entry['timestamp'].strftime('%H:%M:%S')}*")
-                    st.divider()
+                    render_chat_entry(i, chat_entry)
         
         else:
             st.info("👆 Start a new chat session to begin conversational image generation")
@@ -402,36 +458,25 @@ with tab4:
         """)
         
         st.subheader("📋 Quick Prompts")
-        quick_prompts = [
-            "Create a simple landscape",
-            "Make it more colorful",
-            "Add some people",
-            "Change to nighttime",
-            "Make it more artistic",
-            "Add text saying 'Hello World'"
-        ]
-        
-        for prompt in quick_prompts:
-            if st.button(prompt, key=f"quick_{prompt}", use_container_width=True):
-                if st.session_state.chat_session:
-                    with st.spinner("Sending..."):
-                        response = client.send_chat_message(st.session_state.chat_session, prompt)
-                        if response:
-                            st.session_state.chat_history.append({
-                                'user': prompt,
-                                'assistant': response,
-                                'timestamp': datetime.now()
-                            })
-                            if response.get('images'):
-                                for img in response['images']:
-                                    add_to_image_history(img, prompt, "chat")
-                            st.rerun()
+        
+        for row in (QUICK_PROMPTS[:3], QUICK_PROMPTS[3:]):
+            for quick_col, prompt in zip(st.columns(3), row):
+                if quick_col.button(prompt, key=f"quick_{prompt}", use_container_width=True):
+                    if st.session_state.chat_session:
+                        with st.spinner("Sending..."):
+                            send_chat(prompt)
+
 
 # Tab 5: Stories/Recipes Generation
-with tab5:
+@st.fragment
+def stories_tab():
     st.header("📚 Stories & Recipes Generation")
     st.write("Generate multi-image sequences for stories, recipes, or tutorials.")
     
+    if not client_ready:
+        st.info("🔑 Add your Google AI API key in the sidebar to use this tab.")
+        return
+    
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -442,88 +487,108 @@ with tab5:
         )
         
         if content_type == "Story":
-            story_prompt = st.text_area(
+            prompt_text = st.text_area(
                 "Story Description:",
                 placeholder="Create a 6-part adventure story about a brave nano banana exploring different worlds...",
-                height=100
-            )
+                height=100,
+                key="story_prompt"
+            ).strip()
             num_images = st.slider("Number of images:", 3, 10, 6)
             
         elif content_type == "Recipe":
-            recipe_prompt = st.text_area(
+            prompt_text = st.text_area(
                 "Recipe Description:",
                 placeholder="Show me how to make nano banana pancakes with step-by-step images...",
-                height=100
-            )
+                height=100,
+                key="recipe_prompt"
+            ).strip()
             num_images = st.slider("Number of steps:", 4, 12, 8)
             
         elif content_type == "Tutorial":
-            tutorial_prompt = st.text_area(
+            prompt_text = st.text_area(
                 "Tutorial Description:",
                 placeholder="Create a visual tutorial showing how to plant and grow nano bananas...",
-                height=100
-            )
+                height=100,
+                key="tutorial_prompt"
+            ).strip()
             num_images = st.slider("Number of steps:", 4, 15, 10)
             
         else:  # Custom
-            custom_prompt = st.text_area(
+            prompt_text = st.text_area(
                 "Custom Description:",
                 placeholder="Describe what kind of multi-image sequence you want...",
-                height=100
-            )
+                height=100,
+                key="custom_prompt"
+            ).strip()
             num_images = st.slider("Number of images:", 2, 15, 6)
         
-        # Generate button
-        prompt_text = locals().get(f"{content_type.lower()}_prompt", "")
+        single_request = st.toggle(
+            "Single request",
+            help="Ask for the whole sequence in one API call instead of one call per image. "
+                 "Fewer round trips, but nothing shows until every part is done."
+        )
         
-        if st.button(f"📚 Generate {content_type}", type="primary", disabled=not prompt_text.strip()):
-            if client.is_ready():
-                with st.spinner(f"Generating {content_type.lower()}..."):
-                    # Create comprehensive prompt
-                    full_prompt = f"Create a {num_images}-part {content_type.lower()} with images: {prompt_text}"
+        # Generate button
+        generate = st.button(f"📚 Generate {content_type}", type="primary", disabled=not prompt_text)
+        if generate and single_request:
+            with st.spinner(f"Generating {content_type.lower()}..."):
+                # The model interleaves text and images, so one call can return every part
+                full_prompt = (
+                    f"Create a {num_images}-part {content_type.lower()} with one image per part: {prompt_text}. "
+                    f"Keep characters, style and setting consistent across the sequence."
+                )
+                response = cached_generate(full_prompt, model=model)
+                
+                if response and response.get('images'):
+                    st.success(f"✅ {content_type} generated successfully!")
+                    display_response(response, key_prefix="sequence_download")
                     
-                    response = client.generate_image(full_prompt, model=model)
+                    # Add to history
+                    add_many_to_image_history(response['images'], full_prompt, f"{content_type.lower()}-sequence")
+                else:
+                    st.error(f"❌ Failed to generate {content_type.lower()}")
+        elif generate:
+            with st.spinner(f"Generating {content_type.lower()}..."):
+                # One prompt per image so parts render as soon as each is ready
+                part_prompts = [
+                    f"Create image {i + 1} of {num_images} in a {content_type.lower()} sequence: {prompt_text}. "
+                    f"Keep characters, style and setting consistent across the sequence."
+                    for i in range(num_images)
+                ]
+                placeholders = [st.empty() for _ in part_prompts]
+                
+                def show_part(i, response):
+                    with placeholders[i].container():
+                        st.write(f"**Part {i + 1}**")
+                        if response:
+                            display_response(response, key_prefix=f"part_{i}_download")
+                        else:
+                            st.error(f"❌ Failed to generate part {i + 1}")
+                
+                responses = run_parallel(
+                    *(partial(cached_generate, part_prompt, model=model) for part_prompt in part_prompts),
+                    max_concurrency=5,
+                    on_result=show_part
+                )
+                
+                if any(responses):
+                    st.success(f"✅ {content_type} generated successfully!")
                     
-                    if response:
-                        st.success(f"✅ {content_type} generated successfully!")
-                        display_response(response)
-                        
-                        # Add to history
-                        if response.get('images'):
-                            for img in response['images']:
-                                add_to_image_history(img, full_prompt, f"{content_type.lower()}-sequence")
-                    else:
-                        st.error(f"❌ Failed to generate {content_type.lower()}")
-            else:
-                st.error("❌ Client not ready. Check your API key.")
+                    # Add to history
+                    for part_prompt, response in zip(part_prompts, responses):
+                        if response:
+                            add_many_to_image_history(response.get('images'), part_prompt, f"{content_type.lower()}-sequence")
+                else:
+                    st.error(f"❌ Failed to generate {content_type.lower()}")
     
     with col2:
         st.subheader("📋 Templates")
         
-        templates = {
-            "Story": {
-                "Adventure": "A thrilling 8-part adventure story featuring a brave character exploring mysterious lands",
-                "Mystery": "A 6-part mystery story with clues and revelations leading to a surprising conclusion",
-                "Fantasy": "A magical 10-part fantasy tale with mythical creatures and enchanted worlds"
-            },
-            "Recipe": {
-                "Baking": "Step-by-step visual guide for baking delicious nano banana bread",
-                "Cooking": "How to prepare a gourmet nano banana dish from start to finish",
-                "Dessert": "Creating an elaborate nano banana dessert with artistic presentation"
-            },
-            "Tutorial": {
-                "Gardening": "Complete guide to growing nano bananas from seed to harvest",
-                "Art": "How to draw realistic nano bananas using different techniques",
-                "Science": "Scientific experiment showing nano banana properties and reactions"
-            }
-        }
-        
-        if content_type in templates:
+        if content_type in STORY_TEMPLATES:
             st.write(f"**{content_type} Templates:**")
-            for template_name, template_desc in templates[content_type].items():
-                if st.button(template_name, key=f"template_{template_name}", use_container_width=True):
-                    st.session_state[f"{content_type.lower()}_prompt"] = template_desc
-                    st.rerun()
+            for template_name, template_desc in STORY_TEMPLATES[content_type].items():
+                st.button(template_name, key=f"template_{template_name}", use_container_width=True,
+                          on_click=set_state, args=(f"{content_type.lower()}_prompt", template_desc))
         
         st.subheader("💡 Tips")
         st.info(f"""
@@ -535,15 +600,21 @@ with tab5:
         - Consider pacing and flow
         """)
 
+
 # Tab 6: Advanced Editing
-with tab6:
+@st.fragment
+def advanced_editing_tab():
     st.header("🔧 Advanced Editing Techniques")
     st.write("Specialized editing features like inpainting, outpainting, and precision edits.")
     
+    if not client_ready:
+        st.info("🔑 Add your Google AI API key in the sidebar to use this tab.")
+        return
+    
     # Editing technique selection
     technique = st.selectbox(
         "Editing Technique:",
-        ["Inpainting (Modify specific areas)", "Outpainting (Extend image)", "Style Transfer", "Detail Enhancement", "Background Replacement"]
+        list(ADVANCED_PROMPT_TEMPLATES)
     )
     
     col1, col2 = st.columns([1, 1])
@@ -556,7 +627,8 @@ with tab6:
         )
         
         if advanced_image:
-            st.image(advanced_image, caption="Original Image", use_container_width=True)
+            for thumbnail in get_upload_thumbnails("advanced_edit_upload"):
+                st.image(thumbnail, caption="Original Image", use_container_width=True)
     
     with col2:
         st.subheader(f"🎯 {technique}")
@@ -573,7 +645,7 @@ with tab6:
                 height=80
             )
             
-            advanced_prompt = f"In this image, change only {area_description} to {modification}. Keep everything else exactly the same."
+            advanced_prompt = build_advanced_prompt(technique, area_description, modification)
             
         elif technique == "Outpainting (Extend image)":
             direction = st.selectbox("Extend in which direction?", ["all sides", "top", "bottom", "left", "right"])
@@ -583,7 +655,7 @@ with tab6:
                 height=80
             )
             
-            advanced_prompt = f"Extend this image on the {direction} by adding {extension_desc}. Maintain the same style and lighting."
+            advanced_prompt = build_advanced_prompt(technique, direction, extension_desc)
             
         elif technique == "Style Transfer":
             style = st.selectbox(
@@ -591,7 +663,7 @@ with tab6:
                 ["Van Gogh impressionist", "Picasso cubist", "anime/manga", "watercolor painting", "oil painting", "digital art", "pencil sketch"]
             )
             
-            advanced_prompt = f"Transform this image into the style of {style}. Preserve the original composition but render it with the characteristic techniques and aesthetics of {style}."
+            advanced_prompt = build_advanced_prompt(technique, style)
             
         elif technique == "Detail Enhancement":
             enhancement_type = st.selectbox(
@@ -599,7 +671,7 @@ with tab6:
                 ["sharpen details", "enhance colors", "improve lighting", "add texture", "increase realism"]
             )
             
-            advanced_prompt = f"Enhance this image by {enhancement_type}. Improve the overall quality while maintaining the original composition and subject matter."
+            advanced_prompt = build_advanced_prompt(technique, enhancement_type)
             
         else:  # Background Replacement
             new_background = st.text_area(
@@ -608,48 +680,108 @@ with tab6:
                 height=80
             )
             
-            advanced_prompt = f"Replace the background of this image with {new_background}. Keep the main subject exactly the same but place them in the new environment with appropriate lighting and shadows."
+            advanced_prompt = build_advanced_prompt(technique, new_background)
         
-        st.text_area(
-            "Generated Prompt:",
-            value=advanced_prompt,
-            height=100,
-            disabled=True,
-            help="This is the automatically generated prompt based on your selections"
-        )
+        st.write("**Generated Prompt:**")
+        st.code(advanced_prompt, language=None, wrap_lines=True)
+        st.caption("This is the automatically generated prompt based on your selections")
         
         # Edit button
         if st.button("🔧 Apply Advanced Edit", type="primary", 
                     disabled=not (advanced_image and advanced_prompt.strip())):
-            if client.is_ready():
-                with st.spinner("Applying advanced edit..."):
-                    response = client.edit_image(advanced_prompt, advanced_image, model=model)
+            with st.spinner("Applying advanced edit..."):
+                # Build the "original" preview while the API call is in flight
+                response, original_thumbnails = run_parallel(
+                    partial(cached_edit, advanced_prompt, prepare_for_api(advanced_image), model=model),
+                    partial(get_upload_thumbnails, "advanced_edit_upload", max_edge=512)
+                )
+                
+                if response:
+                    st.success("✅ Advanced edit applied successfully!")
+                    
+                    # Show before/after comparison
+                    st.subheader("📊 Before & After")
+                    comp_col1, comp_col2 = st.columns(2)
                     
-                    if response:
-                        st.success("✅ Advanced edit applied successfully!")
-                        
-                        # Show before/after comparison
-                        st.subheader("📊 Before & After")
-                        comp_col1, comp_col2 = st.columns(2)
-                        
-                        with comp_col1:
-                            st.write("**Original:**")
-                            st.image(advanced_image, use_container_width=True)
-                        
-                        with comp_col2:
-                            st.write("**Edited:**")
-                            if response.get('images'):
-                                st.image(response['images'][0], use_container_width=True)
-                                add_to_image_history(response['images'][0], advanced_prompt, f"advanced-{technique}")
-                        
-                        display_response(response)
+                    with comp_col1:
+                        st.write("**Original:**")
+                        st.image(original_thumbnails[0] if original_thumbnails else advanced_image, use_container_width=True)
+                    
+                    with comp_col2:
+                        st.write("**Edited:**")
+                        if response.get('images'):
+                            st.image(response['images'][0], use_container_width=True)
+                            add_to_image_history(response['images'][0], advanced_prompt, f"advanced-{technique}")
+                    
+                    display_response(response)
+                else:
+                    st.error("❌ Failed to apply advanced edit")
+
+
+# Tab 7: Prompt Templates
+@st.fragment
+def template_builder():
+    """Fill in and generate the selected template, rerunning only this column on submit"""
+    st.subheader("🛠️ Template Builder")
+    
+    if 'selected_template_key' in st.session_state:
+        selected_category, template_name = st.session_state.selected_template_key
+        template_data = TEMPLATES_DB[selected_category][template_name]
+        
+        st.write(f"**Editing: {template_name}**")
+        
+        # Variable inputs are batched in a form so edits only rerun on submit
+        with st.form("template_builder_form", border=False):
+            variable_values = {}
+            for variable, label in zip(template_data["variables"], template_data["variable_labels"]):
+                variable_values[variable] = st.text_input(
+                    label,
+                    key=f"var_{variable}",
+                    help=f"Enter value for {variable}"
+                ).strip()
+            
+            num_variations = st.number_input("Variations:", min_value=1, max_value=4, value=1)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.form_submit_button("👁️ Update Prompt", use_container_width=True)
+            with col2:
+                generate = st.form_submit_button("🎨 Generate from Template", type="primary", use_container_width=True)
+        
+        # Generate customized prompt
+        customized_prompt = render_prompt(
+            template_data["tokens"],
+            tuple(sorted((var, value) for var, value in variable_values.items() if value))
+        )
+        
+        st.write("**Generated Prompt:**")
+        st.code(customized_prompt, language=None, wrap_lines=True)
+        
+        if generate:
+            if client_ready:
+                with st.spinner("Generating from template..."):
+                    if num_variations > 1:
+                        # Variations skip the cache so each request gets a fresh image
+                        responses = generate_many([customized_prompt] * num_variations, model=model)
                     else:
-                        st.error("❌ Failed to apply advanced edit")
+                        responses = [cached_generate(customized_prompt, model=model)]
+                    
+                    for i, response in enumerate(responses):
+                        if response:
+                            st.success("✅ Image generated from template!")
+                            display_response(response, key_prefix=f"template_download_{i}")
+                            
+                            add_many_to_image_history(response.get('images'), customized_prompt, f"template-{template_name}")
+                        else:
+                            st.error("❌ Failed to generate image")
             else:
                 st.error("❌ Client not ready. Check your API key.")
+    else:
+        st.info("👈 Select a template from the left to start customizing")
 
-# Tab 7: Prompt Templates
-with tab7:
+
+@st.fragment
+def prompt_templates_tab():
     st.header("📝 Prompt Templates & Examples")
     st.write("Pre-built prompts and templates for common use cases.")
     
@@ -659,88 +791,13 @@ with tab7:
         ["Photorealistic Scenes", "Artistic Styles", "Product Photography", "Character Design", "Landscapes", "Text & Typography"]
     )
     
-    templates_db = {
-        "Photorealistic Scenes": {
-            "Portrait Photography": {
-                "template": "A photorealistic {shot_type} portrait of a {subject_description}, {expression}, shot with a {camera_specs}, {lighting_description}. Professional photography, sharp focus, {mood} mood.",
-                "example": "A photorealistic close-up portrait of a young woman with curly hair, gentle smile, shot with a 85mm lens at f/1.4, soft natural lighting from a large window. Professional photography, sharp focus, warm and inviting mood.",
-                "variables": ["shot_type", "subject_description", "expression", "camera_specs", "lighting_description", "mood"]
-            },
-            "Street Photography": {
-                "template": "A photorealistic street scene in {location}, {time_of_day}, featuring {main_subject}. Shot with {camera_style}, {weather_conditions}, {atmosphere}.",
-                "example": "A photorealistic street scene in Tokyo, golden hour, featuring people crossing a busy intersection. Shot with documentary photography style, light rain creating reflections, bustling urban atmosphere.",
-                "variables": ["location", "time_of_day", "main_subject", "camera_style", "weather_conditions", "atmosphere"]
-            }
-        },
-        "Artistic Styles": {
-            "Digital Art": {
-                "template": "A {style_type} digital artwork of {subject}, rendered in {art_technique}, with {color_palette} colors and {composition_style} composition. {additional_effects}.",
-                "example": "A cyberpunk digital artwork of a futuristic city, rendered in neon-lit vector art style, with electric blue and purple colors and dynamic diagonal composition. Glowing effects and particle systems.",
-                "variables": ["style_type", "subject", "art_technique", "color_palette", "composition_style", "additional_effects"]
-            },
-            "Traditional Art": {
-                "template": "A {medium} painting of {subject} in the style of {artist_style}, using {technique}, {color_approach}, painted on {canvas_type}.",
-                "example": "A watercolor painting of a mountain landscape in the style of Turner, using wet-on-wet technique, luminous atmospheric colors, painted on textured watercolor paper.",
-                "variables": ["medium", "subject", "artist_style", "technique", "color_approach", "canvas_type"]
-            }
-        },
-        "Product Photography": {
-            "E-commerce": {
-                "template": "A professional product photograph of {product}, shot on {background}, with {lighting_setup}. {camera_angle}, {focus_style}, commercial photography style.",
-                "example": "A professional product photograph of a luxury watch, shot on white seamless background, with three-point softbox lighting. 45-degree angle, macro focus on details, commercial photography style.",
-                "variables": ["product", "background", "lighting_setup", "camera_angle", "focus_style"]
-            },
-            "Lifestyle": {
-                "template": "A lifestyle product shot featuring {product} in {setting}, {usage_context}. Natural lighting, {mood}, {target_audience} aesthetic.",
-                "example": "A lifestyle product shot featuring wireless headphones in a modern coffee shop, person working on laptop. Natural window lighting, relaxed morning mood, young professional aesthetic.",
-                "variables": ["product", "setting", "usage_context", "mood", "target_audience"]
-            }
-        },
-        "Character Design": {
-            "Fantasy": {
-                "template": "A {character_type} character design, {physical_description}, wearing {clothing_armor}, holding {equipment}. {art_style} style, {pose}, {background_setting}.",
-                "example": "A female elf warrior character design, tall with silver hair and piercing green eyes, wearing ornate leather armor with gold trim, holding an enchanted bow. Fantasy art style, confident battle stance, mystical forest background.",
-                "variables": ["character_type", "physical_description", "clothing_armor", "equipment", "art_style", "pose", "background_setting"]
-            },
-            "Modern": {
-                "template": "A modern character design of {profession}, {age_appearance}, {distinctive_features}, wearing {outfit_style}. {art_medium} illustration, {personality_traits} expression, {setting}.",
-                "example": "A modern character design of a detective, middle-aged appearance, sharp eyes and graying beard, wearing a classic trench coat. Digital illustration, determined and thoughtful expression, city street at night.",
-                "variables": ["profession", "age_appearance", "distinctive_features", "outfit_style", "art_medium", "personality_traits", "setting"]
-            }
-        },
-        "Landscapes": {
-            "Natural": {
-                "template": "A {landscape_type} landscape during {time}, featuring {main_elements}. {weather_conditions}, {lighting_quality}, {photographic_style}.",
-                "example": "A mountain valley landscape during sunrise, featuring snow-capped peaks and alpine lake. Clear skies with morning mist, golden hour lighting, landscape photography with telephoto compression.",
-                "variables": ["landscape_type", "time", "main_elements", "weather_conditions", "lighting_quality", "photographic_style"]
-            },
-            "Urban": {
-                "template": "An urban {cityscape_type} of {city_description}, {architectural_style}, {time_period}. {viewing_angle}, {lighting_atmosphere}, {mood}.",
-                "example": "An urban skyline of a futuristic metropolis, sleek glass and steel architecture, cyberpunk aesthetic. Aerial drone perspective, neon-lit night atmosphere, dramatic and imposing mood.",
-                "variables": ["cityscape_type", "city_description", "architectural_style", "time_period", "viewing_angle", "lighting_atmosphere", "mood"]
-            }
-        },
-        "Text & Typography": {
-            "Logo Design": {
-                "template": "A {logo_style} logo for {business_type} called '{business_name}', featuring {design_elements}, {color_scheme} color scheme, {typography_style} typography.",
-                "example": "A minimalist logo for coffee shop called 'Bean & Brew', featuring a stylized coffee bean, warm brown and cream color scheme, modern sans-serif typography.",
-                "variables": ["logo_style", "business_type", "business_name", "design_elements", "color_scheme", "typography_style"]
-            },
-            "Typography Art": {
-                "template": "A typographic artwork with the text '{text_content}' in {font_style} style, {layout_approach}, {decorative_elements}, {background_treatment}.",
-                "example": "A typographic artwork with the text 'Create Magic' in hand-lettered calligraphy style, flowing curved layout, golden flourishes and swirls, dark gradient background.",
-                "variables": ["text_content", "font_style", "layout_approach", "decorative_elements", "background_treatment"]
-            }
-        }
-    }
-    
-    if template_category in templates_db:
+    if template_category in TEMPLATES_DB:
         col1, col2 = st.columns([1, 1])
         
         with col1:
             st.subheader("📋 Available Templates")
             
-            for template_name, template_data in templates_db[template_category].items():
+            for template_name, template_data in TEMPLATES_DB[template_category].items():
                 with st.expander(template_name):
                     st.write("**Template:**")
                     st.code(template_data["template"], language="text")
@@ -749,64 +806,13 @@ with tab7:
                     st.write(template_data["example"])
                     
                     st.write("**Variables:**")
-                    st.write(", ".join(f"`{var}`" for var in template_data["variables"]))
+                    st.write(template_data["variables_text"])
                     
-                    if st.button(f"Use {template_name} Template", key=f"use_template_{template_name}"):
-                        st.session_state.selected_template = template_data
-                        st.session_state.template_name = template_name
-                        st.rerun()
+                    if st.button(template_data["use_label"], key=template_data["use_key"]):
+                        st.session_state.selected_template_key = (template_category, template_name)
         
         with col2:
-            st.subheader("🛠️ Template Builder")
-            
-            if 'selected_template' in st.session_state:
-                template_data = st.session_state.selected_template
-                template_name = st.session_state.template_name
-                
-                st.write(f"**Editing: {template_name}**")
-                
-                # Variable inputs
-                variable_values = {}
-                for variable in template_data["variables"]:
-                    variable_values[variable] = st.text_input(
-                        f"{variable.replace('_', ' ').title()}:",
-                        key=f"var_{variable}",
-                        help=f"Enter value for {variable}"
-                    )
-                
-                # Generate customized prompt
-                customized_prompt = template_data["template"]
-                for var, value in variable_values.items():
-                    if value.strip():
-                        customized_prompt = customized_prompt.replace(f"{{{var}}}", value)
-                
-                st.write("**Generated Prompt:**")
-                st.text_area(
-                    "Your customized prompt:",
-                    value=customized_prompt,
-                    height=100,
-                    key="customized_prompt"
-                )
-                
-                # Generate button
-                if st.button("🎨 Generate from Template", type="primary"):
-                    if client.is_ready():
-                        with st.spinner("Generating from template..."):
-                            response = client.generate_image(customized_prompt, model=model)
-                            
-                            if response:
-                                st.success("✅ Image generated from template!")
-                                display_response(response)
-                                
-                                if response.get('images'):
-                                    for img in response['images']:
-                                        add_to_image_history(img, customized_prompt, f"template-{template_name}")
-                            else:
-                                st.error("❌ Failed to generate image")
-                    else:
-                        st.error("❌ Client not ready. Check your API key.")
-            else:
-                st.info("👈 Select a template from the left to start customizing")
+            template_builder()
     
     # Custom template creation
     st.divider()
@@ -822,8 +828,7 @@ with tab7:
         
         if custom_template and custom_name:
             # Extract variables from template
-            import re
-            variables = re.findall(r'\{(\w+)\}', custom_template)
+            variables = TEMPLATE_VAR_RE.findall(custom_template)
             
             if variables:
                 st.write("**Detected Variables:**", ", ".join(variables))
@@ -832,8 +837,17 @@ with tab7:
                     # In a real app, you'd save this to a database or file
                     st.success(f"Template '{custom_name}' saved!")
 
+
 # Tab 8: Documentation
-with tab8:
+def render_doc_expanders(section: str):
+    """Render a documentation section's expanders, one markdown call each"""
+    for label, body in doc_expanders(section):
+        with st.expander(label):
+            st.markdown(body)
+
+
+@st.fragment
+def documentation_tab():
     st.header("📖 Documentation & Best Practices")
     st.write("Complete guide to using the Gemini Image Generation API effectively.")
     
@@ -880,39 +894,7 @@ response = client.models.generate_content(
     elif doc_section == "API Features":
         st.subheader("🔧 API Features Overview")
         
-        features = {
-            "Text-to-Image": {
-                "description": "Generate high-quality images from text descriptions",
-                "use_cases": ["Creative art", "Concept visualization", "Marketing materials", "Illustrations"],
-                "example": "A surreal landscape with floating islands and waterfalls"
-            },
-            "Image Editing": {
-                "description": "Modify existing images using text prompts",
-                "use_cases": ["Photo retouching", "Style changes", "Object addition/removal", "Background replacement"],
-                "example": "Change the cat's fur color from black to orange"
-            },
-            "Multi-Image Composition": {
-                "description": "Combine elements from multiple images",
-                "use_cases": ["Product mockups", "Style transfer", "Character consistency", "Scene composition"],
-                "example": "Place the person from image 1 in the setting from image 2"
-            },
-            "Iterative Chat": {
-                "description": "Refine images through conversation",
-                "use_cases": ["Progressive refinement", "Character development", "Artistic exploration", "Feedback incorporation"],
-                "example": "Make the lighting warmer... now add some fog... perfect!"
-            },
-            "Sequential Generation": {
-                "description": "Create stories, tutorials, or recipes with multiple images",
-                "use_cases": ["Storytelling", "Educational content", "Process documentation", "Comic creation"],
-                "example": "Show the 8 steps of making banana bread"
-            }
-        }
-        
-        for feature, details in features.items():
-            with st.expander(f"📋 {feature}"):
-                st.write(f"**Description:** {details['description']}")
-                st.write(f"**Use Cases:** {', '.join(details['use_cases'])}")
-                st.write(f"**Example:** *{details['example']}*")
+        render_doc_expanders(doc_section)
     
     elif doc_section == "Prompt Engineering":
         st.subheader("✍️ Prompt Engineering Guide")
@@ -944,71 +926,18 @@ in/on/at [Setting/Location],
         
         st.write("### Essential Elements to Include")
         
-        elements = {
-            "Subject Description": ["Physical appearance", "Clothing/accessories", "Expression/pose", "Age/characteristics"],
-            "Setting & Environment": ["Location type", "Time of day/season", "Weather conditions", "Background elements"],
-            "Lighting & Atmosphere": ["Light source", "Quality (soft/harsh)", "Direction", "Color temperature", "Mood"],
-            "Style & Technical": ["Art style", "Camera angle", "Composition", "Color palette", "Artistic medium"],
-            "Quality & Details": ["Resolution hints", "Focus areas", "Texture details", "Professional terms"]
-        }
-        
-        for category, items in elements.items():
-            with st.expander(f"🔍 {category}"):
-                for item in items:
-                    st.write(f"• {item}")
+        render_doc_expanders(doc_section)
         
         st.write("### Prompt Examples by Category")
         
-        example_prompts = {
-            "Portrait Photography": "A professional headshot of a confident businesswoman in her 40s, wearing a navy blue blazer, gentle smile, shot with an 85mm lens at f/2.8, soft natural lighting from a large window, clean white background, corporate photography style",
-            "Landscape": "A breathtaking sunrise over a misty mountain valley, golden hour lighting illuminating snow-capped peaks, alpine lake reflecting the sky, captured with wide-angle lens, landscape photography, serene and majestic mood",
-            "Product Photography": "A high-end product photograph of a luxury watch on a black marble surface, three-point studio lighting setup, macro lens capturing intricate details, subtle reflections, commercial photography style, premium aesthetic",
-            "Artistic/Creative": "A whimsical watercolor illustration of a magical forest, soft pastel colors, dappled sunlight filtering through leaves, fairy-tale atmosphere, children's book illustration style, dreamlike and enchanting",
-            "Street Photography": "A candid street scene in Tokyo during a light rain, neon signs reflecting on wet pavement, people with umbrellas walking past, shot with documentary photography style, urban atmosphere, evening blue hour"
-        }
-        
-        for category, prompt in example_prompts.items():
+        for category, prompt in DOC_EXAMPLE_PROMPTS.items():
             with st.expander(f"📝 {category}"):
                 st.code(prompt, language="text")
     
     elif doc_section == "Best Practices":
         st.subheader("⭐ Best Practices")
         
-        practices = {
-            "Prompt Writing": [
-                "Be hyper-specific with descriptions",
-                "Use professional photography/art terminology",
-                "Include lighting and mood details",
-                "Specify camera angles and composition",
-                "Mention artistic style or medium"
-            ],
-            "Image Editing": [
-                "Describe changes in context of the original image",
-                "Be specific about what to keep vs. change",
-                "Use 'semantic masking' language",
-                "Preserve important details explicitly",
-                "Consider lighting consistency"
-            ],
-            "Multi-Image Work": [
-                "Limit to 3 images maximum",
-                "Describe how images should combine",
-                "Be specific about which elements to use",
-                "Consider style consistency",
-                "Explain desired composition"
-            ],
-            "Iterative Refinement": [
-                "Start with broad concepts, then refine",
-                "Make one change at a time",
-                "Use conversational language",
-                "Reference previous images in context",
-                "Build character consistency"
-            ]
-        }
-        
-        for category, tips in practices.items():
-            with st.expander(f"💡 {category}"):
-                for tip in tips:
-                    st.write(f"• {tip}")
+        render_doc_expanders(doc_section)
         
         st.write("### Performance Tips")
         st.info("""
@@ -1022,34 +951,7 @@ in/on/at [Setting/Location],
     elif doc_section == "Limitations":
         st.subheader("⚠️ Current Limitations")
         
-        limitations = {
-            "Technical": [
-                "Model works best with a reasonable number of input images",
-                "No audio or video input support",
-                "Limited to certain languages (EN, es-MX, ja-JP, zh-CN, hi-IN)",
-                "All generated images include SynthID watermark",
-                "May not always follow exact number of output images requested"
-            ],
-            "Content": [
-                "Cannot upload images of children in EEA, CH, and UK",
-                "Subject to Google's usage policies",
-                "Cannot generate inappropriate or harmful content",
-                "May struggle with very specific brand logos or copyrighted material",
-                "Text rendering, while good, may not always be perfect"
-            ],
-            "Performance": [
-                "Higher latency compared to specialized image models",
-                "Token-based pricing can be expensive for high usage",
-                "May require multiple iterations for perfect results",
-                "Limited control over exact image dimensions",
-                "Processing time varies with complexity"
-            ]
-        }
-        
-        for category, items in limitations.items():
-            with st.expander(f"📋 {category} Limitations"):
-                for item in items:
-                    st.write(f"• {item}")
+        render_doc_expanders(doc_section)
         
         st.write("### When to Use Imagen Instead")
         st.info("""
@@ -1064,56 +966,7 @@ in/on/at [Setting/Location],
     elif doc_section == "Troubleshooting":
         st.subheader("🔧 Troubleshooting Guide")
         
-        issues = {
-            "API Key Issues": {
-                "symptoms": ["Authentication errors", "Client not ready", "Access denied"],
-                "solutions": [
-                    "Verify API key is correct",
-                    "Check API key has proper permissions",
-                    "Ensure key is set in environment variables or .env file",
-                    "Try refreshing the client connection"
-                ]
-            },
-            "Poor Image Quality": {
-                "symptoms": ["Blurry images", "Incorrect details", "Wrong style"],
-                "solutions": [
-                    "Make prompts more specific and detailed",
-                    "Add professional photography terminology",
-                    "Specify lighting and composition",
-                    "Include quality indicators like 'high resolution', 'sharp focus'",
-                    "Try iterative refinement in chat mode"
-                ]
-            },
-            "Slow Generation": {
-                "symptoms": ["Long wait times", "Timeouts", "Connection errors"],
-                "solutions": [
-                    "Simplify complex prompts",
-                    "Reduce number of images requested",
-                    "Check internet connection",
-                    "Try generating during off-peak hours",
-                    "Use shorter, more focused prompts"
-                ]
-            },
-            "Unexpected Results": {
-                "symptoms": ["Wrong subject", "Missing elements", "Incorrect style"],
-                "solutions": [
-                    "Be more explicit in descriptions",
-                    "Use step-by-step instructions",
-                    "Reference specific art styles or photographers",
-                    "Use negative prompts (semantic negative)",
-                    "Try multiple variations of the same prompt"
-                ]
-            }
-        }
-        
-        for issue, details in issues.items():
-            with st.expander(f"❓ {issue}"):
-                st.write("**Symptoms:**")
-                for symptom in details["symptoms"]:
-                    st.write(f"• {symptom}")
-                st.write("**Solutions:**")
-                for solution in details["solutions"]:
-                    st.write(f"• {solution}")
+        render_doc_expanders(doc_section)
     
     elif doc_section == "Code Examples":
         st.subheader("💻 Code Examples")
@@ -1230,6 +1083,19 @@ else:
     st.warning("Failed to generate image. Please try again.")
         """, language="python")
 
+
+TAB_BODIES = dict(zip(TAB_NAMES, (
+    text_to_image_tab,
+    image_editing_tab,
+    multi_image_tab,
+    chat_tab,
+    stories_tab,
+    advanced_editing_tab,
+    prompt_templates_tab,
+    documentation_tab
+)))
+TAB_BODIES[active_tab]()
+
 # Footer
 st.divider()
 st.write("---")
@@ -1237,7 +1103,7 @@ st.caption("🍌 Nano Banana - Gemini Image Generation API Testing App | Built w
 st.caption("For issues or feedback, visit the [GitHub repository](https://github.com/your-repo/nano-banana)")
 
 # API Status indicator
-if client.is_ready():
+if client_ready:
     st.success("🟢 API Connection: Ready")
 else:
     st.error("🔴 API Connection: Not Ready")
\ No newline at end of file
@@ -0,0 +1 @@
+# Lets the tests under tests/ import the app packages from the repository root
@@ -4,9 +4,9 @@ Demo script for Nano Banana - generates a sample image to test the API
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from dotenv import load_dotenv
-from utils.api_client import get_client
+from utils.api_client import get_client, load_env_once
 from PIL import Image
 
 def main():
@@ -15,7 +15,7 @@ def main():
     print("=" * 40)
     
     # Load environment
-    load_dotenv()
+    load_env_once()
     
     # Get client
     client = get_client()
@@ -47,15 +47,28 @@ def main():
             # Save images
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            for i, image in enumerate(response['images']):
-                filename = f"demo_nano_banana_{timestamp}_{i+1}.png"
-                filepath = os.path.join("generated_images", filename)
-                
-                # Create directory if it doesn't exist
-                os.makedirs("generated_images", exist_ok=True)
-                
-                # Save image
-                image.save(filepath)
+            # Create directory if it doesn't exist
+            os.makedirs("generated_images", exist_ok=True)
+
+            filepaths = [
+                os.path.join("generated_images", f"demo_nano_banana_{timestamp}_{i+1}.png")
+                for i in range(len(response['images']))
+            ]
+
+            # Write the images concurrently; light compression keeps saves fast
+            def save(image, path):
+                image_bytes = getattr(image, 'image_bytes', None)
+                if image_bytes:
+                    # SDK images arrive already PNG-encoded
+                    with open(path, 'wb') as f:
+                        f.write(image_bytes)
+                else:
+                    image.save(path, format="PNG", compress_level=1, optimize=False)
+            
+            with ThreadPoolExecutor(max_workers=min(4, len(filepaths))) as executor:
+                list(executor.map(save, response['images'], filepaths))
+
+            for filepath in filepaths:
                 print(f"💾 Saved: {filepath}")
             
             # Display text response if any
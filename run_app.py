@@ -5,22 +5,26 @@ Startup script for Nano Banana Streamlit app
 
 import os
 import sys
-import subprocess
+from importlib.util import find_spec
 from pathlib import Path
 
+# Packages the app imports, checked by location only; Streamlit imports them when it runs the app
+REQUIRED_MODULES = ["streamlit", "google.genai", "PIL", "dotenv"]
+
 def check_requirements():
     """Check if all requirements are installed"""
-    try:
-        import streamlit
-        from google import genai
-        from PIL import Image
-        from dotenv import load_dotenv
-        print("✅ All required packages are installed")
-        return True
-    except ImportError as e:
-        print(f"❌ Missing package: {e}")
-        print("Run: pip install -r requirements.txt")
-        return False
+    for name in REQUIRED_MODULES:
+        try:
+            missing = find_spec(name) is None
+        except ModuleNotFoundError:
+            # Raised when a parent package such as `google` is itself missing
+            missing = True
+        if missing:
+            print(f"❌ Missing package: {name}")
+            print("Run: pip install -r requirements.txt")
+            return False
+    print("✅ All required packages are installed")
+    return True
 
 def check_api_key():
     """Check if API key is configured"""
@@ -66,12 +70,15 @@ def main():
     print("Press Ctrl+C to stop the app")
     print("=" * 40)
     
+    # Run the Streamlit CLI in this interpreter instead of starting a second one;
+    # it loads config and flag options exactly like `streamlit run` does
+    from streamlit.web import cli as streamlit_cli
+    
+    sys.argv = ["streamlit", "run", "app.py", "--server.headless=false"]
     try:
-        subprocess.run([
-            sys.executable, "-m", "streamlit", "run", "app.py",
-            "--server.headless=false"
-        ])
-    except KeyboardInterrupt:
+        streamlit_cli.main()
+    finally:
+        # Streamlit handles Ctrl+C itself and the CLI then exits via SystemExit
         print("\n👋 Shutting down Nano Banana...")
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import asyncio
+import base64
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+from google import genai
+from google.genai import types
+
+import utils.api_client as api_client
+
+
+def _png_response_body() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, format='PNG')
+    return json.dumps({"candidates": [{"content": {"role": "model", "parts": [
+        {"inlineData": {"mimeType": "image/png", "data": base64.b64encode(buffer.getvalue()).decode()}}
+    ]}}]}).encode()
+
+
+class _GenerateContentStub(BaseHTTPRequestHandler):
+    body = _png_response_body()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    """Point the shared client at a local generateContent stub"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _GenerateContentStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    real_client = genai.Client
+
+    def client_factory(api_key):
+        return real_client(
+            api_key=api_key,
+            http_options=types.HttpOptions(base_url=f"http://127.0.0.1:{server.server_port}")
+        )
+
+    monkeypatch.setenv('GOOGLE_API_KEY', 'test-key')
+    monkeypatch.setattr(api_client.genai, 'Client', client_factory)
+    api_client.get_client.clear()
+    yield api_client.get_client()
+    api_client.get_client.clear()
+    server.shutdown()
+
+
+def test_generate_many_twice_in_a_row(stub_client):
+    for _ in range(2):
+        responses = api_client.generate_many(["a", "b", "c"])
+        assert [len(response['images']) for response in responses] == [1, 1, 1]
+
+
+def test_generate_many_reuses_one_event_loop(stub_client, monkeypatch):
+    loops = []
+
+    async def fake_generate(prompt, model, response_modalities=None):
+        loops.append(asyncio.get_running_loop())
+        return {'text': [prompt], 'images': []}
+
+    monkeypatch.setattr(stub_client, '_generate_content_async', fake_generate)
+    api_client.generate_many(["a", "b"])
+    api_client.generate_many(["c"])
+    assert len(set(map(id, loops))) == 1
+    assert not loops[0].is_closed()
+
+
+def test_generate_many_reports_parse_failures_as_none(stub_client, monkeypatch):
+    def broken_fit(image):
+        raise ValueError("cannot fit image")
+
+    monkeypatch.setattr(api_client, 'fit_response_image', broken_fit)
+    assert api_client.generate_many(["a", "b"]) == [None, None]
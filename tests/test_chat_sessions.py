@@ -0,0 +1,111 @@
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'api-docs'))
+api = pytest.importorskip('fastapi_implementation')
+
+
+def _new_session(store, session_id='s1'):
+    asyncio.run(store.put(session_id, {
+        'model': 'test-model',
+        'created_at': datetime.now(),
+        'message_count': 0,
+        'context_length': 0,
+        'history': []
+    }))
+    return asyncio.run(store.get(session_id))
+
+
+def test_commit_on_expired_session_returns_none():
+    store = api.InMemorySessionStore(ttl=-1)
+    _new_session(store)
+    assert asyncio.run(store.commit('s1', 0, [{'role': 'user'}], 5)) is None
+
+
+def test_commit_with_stale_version_is_refused():
+    store = api.InMemorySessionStore(ttl=60)
+    _new_session(store)
+    assert asyncio.run(store.commit('s1', 0, [{'role': 'first'}], 5)) is True
+    assert asyncio.run(store.commit('s1', 0, [{'role': 'second'}], 5)) is False
+    assert asyncio.run(store.get('s1'))['history'] == [{'role': 'first'}]
+
+
+def test_commit_bumps_version_and_counters():
+    store = api.InMemorySessionStore(ttl=60)
+    session = _new_session(store)
+    assert asyncio.run(store.commit('s1', session['version'], [{'role': 'user'}], 5)) is True
+    updated = asyncio.run(store.get('s1'))
+    assert updated['version'] == session['version'] + 1
+    assert updated['message_count'] == session['message_count'] + 1
+    assert updated['context_length'] == session['context_length'] + 5
+    assert updated['history'] == [{'role': 'user'}]
+
+
+@pytest.fixture
+def chat_app(monkeypatch):
+    """Point send_chat_message at a fresh store and a fake Gemini chat"""
+    store = api.InMemorySessionStore(ttl=60)
+    during_send = []
+
+    async def send_message(parts):
+        for hook in during_send:
+            await hook()
+        return object()
+
+    chat = SimpleNamespace(send_message=send_message, get_history=lambda: [])
+    client = SimpleNamespace(aio=SimpleNamespace(chats=SimpleNamespace(create=lambda **kwargs: chat)))
+
+    async def extract_response_content(response):
+        return {'text': ['ok'], 'images': []}
+
+    monkeypatch.setattr(api, 'session_store', store)
+    monkeypatch.setattr(api, 'gemini_client', client)
+    monkeypatch.setattr(api, 'extract_response_content', extract_response_content)
+    return store, during_send
+
+
+def _send(message='make it blue'):
+    return asyncio.run(api.send_chat_message(
+        's1', form=api.ChatMessageRequest(message=message), image=None, api_key='test-key'
+    ))
+
+
+def test_send_chat_message_commits_the_exchange(chat_app):
+    store, _ = chat_app
+    _new_session(store)
+    assert _send().text == ['ok']
+    assert asyncio.run(store.get('s1'))['message_count'] == 1
+
+
+def test_send_chat_message_on_session_expired_mid_call_returns_404(chat_app):
+    store, during_send = chat_app
+    _new_session(store)
+
+    async def expire():
+        store._sessions['s1'] = (0, store._sessions['s1'][1])
+
+    during_send.append(expire)
+    with pytest.raises(HTTPException) as error:
+        _send()
+    assert error.value.status_code == 404
+    assert asyncio.run(store.get('s1')) is None
+
+
+def test_send_chat_message_losing_a_race_returns_409(chat_app):
+    store, during_send = chat_app
+    _new_session(store)
+
+    async def other_worker_commits():
+        await store.commit('s1', 0, [{'role': 'other'}], 3)
+
+    during_send.append(other_worker_commits)
+    with pytest.raises(HTTPException) as error:
+        _send()
+    assert error.value.status_code == 409
+    assert asyncio.run(store.get('s1'))['history'] == [{'role': 'other'}]
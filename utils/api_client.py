@@ -1,25 +1,35 @@
 import os
-from typing import List, Optional, Union
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Union
 from PIL import Image
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from google import genai
 from google.genai import types
 import io
 
+from .image_utils import fit_response_image
+
+
+@lru_cache(maxsize=1)
+def load_env_once() -> bool:
+    """Load the .env file into the environment once per process"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return False
+    # Never override variables that are already set, e.g. a key entered in the app
+    return load_dotenv(override=False)
+
 
 class GeminiImageClient:
-    """Singleton client for Gemini Image Generation API"""
-    
-    _instance = None
-    _client = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    """Client for Gemini Image Generation API, shared process-wide via get_client()"""
     
-    def __init__(self):
-        if self._client is None:
+    def __init__(self, connect: bool = True):
+        self._client = None
+        if connect:
             self.initialize_client()
     
     def initialize_client(self):
@@ -50,16 +60,12 @@ class GeminiImageClient:
             pass
         
         # Try loading from .env file
-        try:
-            from dotenv import load_dotenv
-            load_dotenv()
-            api_key = os.getenv('GOOGLE_API_KEY')
-            if api_key:
-                return api_key
-        except ImportError:
-            pass
-        
-        return None
+        load_env_once()
+        return os.getenv('GOOGLE_API_KEY') or None
+    
+    def has_credentials(self) -> bool:
+        """Check for an API key without creating the Gemini client"""
+        return bool(self.get_api_key())
     
     def is_ready(self) -> bool:
         """Check if client is ready to use"""
@@ -94,6 +100,26 @@ class GeminiImageClient:
             st.error(f"Error generating image: {str(e)}")
             return None
     
+    async def _generate_content_async(
+        self,
+        prompt: str,
+        model: str,
+        response_modalities: List[str] = None
+    ) -> dict:
+        """Request and process a generation on the async client, raising on failure"""
+        if response_modalities is None:
+            response_modalities = ['Text', 'Image']
+        
+        response = await self._client.aio.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_modalities=response_modalities
+            )
+        )
+        
+        return self._parse_response(response)
+    
     def edit_image(
         self,
         prompt: str,
@@ -152,26 +178,111 @@ class GeminiImageClient:
     
     def _process_response(self, response) -> dict:
         """Process API response and extract text and images"""
+        # The response itself is not kept, so its protobuf tree can be freed right away
         result = {
             'text': [],
-            'images': [],
-            'raw_response': response
+            'images': []
         }
         
         try:
-            for part in response.parts:
-                if part.text:
-                    result['text'].append(part.text)
-                elif hasattr(part, 'as_image'):
-                    image = part.as_image()
-                    if image:
-                        result['images'].append(image)
+            self._parse_response(response, result)
         except Exception as e:
             st.error(f"Error processing response: {str(e)}")
         
         return result
+    
+    def _parse_response(self, response, result: Optional[dict] = None) -> dict:
+        """Collect text and images from an API response into result, raising on failure"""
+        if result is None:
+            result = {
+                'text': [],
+                'images': []
+            }
+        
+        for part in response.parts:
+            if part.text:
+                result['text'].append(part.text)
+            elif hasattr(part, 'as_image'):
+                image = part.as_image()
+                if image:
+                    # The model works best up to 1024px; keep larger returns from
+                    # inflating display, download and history work downstream
+                    result['images'].append(fit_response_image(image))
+        
+        return result
 
 
+@st.cache_resource(show_spinner=False)
 def get_client() -> GeminiImageClient:
-    """Get or create the singleton client instance"""
-    return GeminiImageClient()
\ No newline at end of file
+    """Get or create the shared client instance"""
+    return GeminiImageClient()
+
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the process-wide event loop that runs async API calls in a background thread"""
+    # The shared client's async transport binds to the first loop it runs on,
+    # so every async call has to go through this one loop rather than asyncio.run
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="genai-async", daemon=True).start()
+    return loop
+
+
+def generate_many(
+    prompts: List[str],
+    model: str = "gemini-2.5-flash-image-preview",
+    max_concurrency: int = 5
+) -> List[Optional[dict]]:
+    """Generate one response per prompt with overlapping async requests"""
+    client = get_client()
+    if not client.is_ready():
+        st.error("Client not initialized. Please check your API key.")
+        return [None] * len(prompts)
+    
+    async def gather():
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def generate(prompt):
+            async with semaphore:
+                return await client._generate_content_async(prompt, model)
+        
+        return await asyncio.gather(*(generate(prompt) for prompt in prompts), return_exceptions=True)
+    
+    results = asyncio.run_coroutine_threadsafe(gather(), get_event_loop()).result()
+    
+    # The loop thread has no script context, so errors are reported from here
+    responses = []
+    for result in results:
+        if isinstance(result, Exception):
+            st.error(f"Error generating image: {str(result)}")
+            result = None
+        responses.append(result)
+    return responses
+
+
+def run_parallel(
+    *calls: Callable[[], Any],
+    max_concurrency: Optional[int] = None,
+    on_result: Optional[Callable[[int, Any], None]] = None
+) -> List[Any]:
+    """Run blocking calls concurrently in worker threads and return their results in order"""
+    ctx = get_script_run_ctx()
+    semaphore = asyncio.Semaphore(max_concurrency or len(calls) or 1)
+    
+    def bound(call):
+        # Let st.error and friends inside the call reach the current page
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return call()
+    
+    async def run(index, call):
+        async with semaphore:
+            result = await asyncio.to_thread(bound, call)
+        # Called back on the script thread as soon as this call finishes
+        if on_result is not None:
+            on_result(index, result)
+        return result
+    
+    async def gather():
+        return await asyncio.gather(*(run(i, call) for i, call in enumerate(calls)))
+    
+    return asyncio.run(gather())
@@ -0,0 +1,66 @@
+import hashlib
+from typing import List, Optional, Union
+from PIL import Image
+import streamlit as st
+
+from .api_client import get_client
+
+
+class _NoResponse(Exception):
+    """Raised inside cached calls so failed requests are not cached"""
+
+
+def images_cache_key(images: Union[Image.Image, List[Image.Image]]) -> str:
+    """Build a cache key for images, reusing the upload digest when present"""
+    if isinstance(images, Image.Image):
+        images = [images]
+    key = hashlib.sha1()
+    for image in images:
+        key.update(f"{image.mode}|{image.size}|".encode())
+        # Uploads carry the hash of their file bytes; only hash pixels otherwise
+        upload_digest = image.info.get('digest')
+        key.update(upload_digest.encode() if upload_digest else image.tobytes())
+    return key.hexdigest()
+
+
+@st.cache_data(show_spinner=False, ttl=6 * 60 * 60, max_entries=128)
+def _cached_generate(prompt: str, model: str) -> dict:
+    response = get_client().generate_image(prompt, model=model)
+    if response is None:
+        raise _NoResponse
+    return response
+
+
+@st.cache_data(show_spinner=False, ttl=6 * 60 * 60, max_entries=128)
+def _cached_edit(prompt: str, images_key: str, _images, model: str) -> dict:
+    # _images is excluded from the cache key; images_key stands in for it
+    response = get_client().edit_image(prompt, _images, model=model)
+    if response is None:
+        raise _NoResponse
+    return response
+
+
+def cached_generate(prompt: str, model: str) -> Optional[dict]:
+    """Generate image from text prompt, reusing results for repeated prompts"""
+    try:
+        return _cached_generate(prompt, model)
+    except _NoResponse:
+        return None
+
+
+def cached_edit(
+    prompt: str,
+    images: Union[Image.Image, List[Image.Image]],
+    model: str
+) -> Optional[dict]:
+    """Edit image(s) with text prompt, reusing results for repeated requests"""
+    try:
+        return _cached_edit(prompt, images_cache_key(images), images, model)
+    except _NoResponse:
+        return None
+
+
+def clear_api_cache():
+    """Drop all cached generation and edit results"""
+    _cached_generate.clear()
+    _cached_edit.clear()
@@ -0,0 +1,177 @@
+from functools import lru_cache
+
+
+# Documentation tab content. Kept out of app.py, which Streamlit re-executes on
+# every rerun, so the tables are built once per process.
+DOC_FEATURES = {
+    "Text-to-Image": {
+        "description": "Generate high-quality images from text descriptions",
+        "use_cases": ["Creative art", "Concept visualization", "Marketing materials", "Illustrations"],
+        "example": "A surreal landscape with floating islands and waterfalls"
+    },
+    "Image Editing": {
+        "description": "Modify existing images using text prompts",
+        "use_cases": ["Photo retouching", "Style changes", "Object addition/removal", "Background replacement"],
+        "example": "Change the cat's fur color from black to orange"
+    },
+    "Multi-Image Composition": {
+        "description": "Combine elements from multiple images",
+        "use_cases": ["Product mockups", "Style transfer", "Character consistency", "Scene composition"],
+        "example": "Place the person from image 1 in the setting from image 2"
+    },
+    "Iterative Chat": {
+        "description": "Refine images through conversation",
+        "use_cases": ["Progressive refinement", "Character development", "Artistic exploration", "Feedback incorporation"],
+        "example": "Make the lighting warmer... now add some fog... perfect!"
+    },
+    "Sequential Generation": {
+        "description": "Create stories, tutorials, or recipes with multiple images",
+        "use_cases": ["Storytelling", "Educational content", "Process documentation", "Comic creation"],
+        "example": "Show the 8 steps of making banana bread"
+    }
+}
+
+PROMPT_ELEMENTS = {
+    "Subject Description": ["Physical appearance", "Clothing/accessories", "Expression/pose", "Age/characteristics"],
+    "Setting & Environment": ["Location type", "Time of day/season", "Weather conditions", "Background elements"],
+    "Lighting & Atmosphere": ["Light source", "Quality (soft/harsh)", "Direction", "Color temperature", "Mood"],
+    "Style & Technical": ["Art style", "Camera angle", "Composition", "Color palette", "Artistic medium"],
+    "Quality & Details": ["Resolution hints", "Focus areas", "Texture details", "Professional terms"]
+}
+
+DOC_EXAMPLE_PROMPTS = {
+    "Portrait Photography": "A professional headshot of a confident businesswoman in her 40s, wearing a navy blue blazer, gentle smile, shot with an 85mm lens at f/2.8, soft natural lighting from a large window, clean white background, corporate photography style",
+    "Landscape": "A breathtaking sunrise over a misty mountain valley, golden hour lighting illuminating snow-capped peaks, alpine lake reflecting the sky, captured with wide-angle lens, landscape photography, serene and majestic mood",
+    "Product Photography": "A high-end product photograph of a luxury watch on a black marble surface, three-point studio lighting setup, macro lens capturing intricate details, subtle reflections, commercial photography style, premium aesthetic",
+    "Artistic/Creative": "A whimsical watercolor illustration of a magical forest, soft pastel colors, dappled sunlight filtering through leaves, fairy-tale atmosphere, children's book illustration style, dreamlike and enchanting",
+    "Street Photography": "A candid street scene in Tokyo during a light rain, neon signs reflecting on wet pavement, people with umbrellas walking past, shot with documentary photography style, urban atmosphere, evening blue hour"
+}
+
+BEST_PRACTICES = {
+    "Prompt Writing": [
+        "Be hyper-specific with descriptions",
+        "Use professional photography/art terminology",
+        "Include lighting and mood details",
+        "Specify camera angles and composition",
+        "Mention artistic style or medium"
+    ],
+    "Image Editing": [
+        "Describe changes in context of the original image",
+        "Be specific about what to keep vs. change",
+        "Use 'semantic masking' language",
+        "Preserve important details explicitly",
+        "Consider lighting consistency"
+    ],
+    "Multi-Image Work": [
+        "Limit to 3 images maximum",
+        "Describe how images should combine",
+        "Be specific about which elements to use",
+        "Consider style consistency",
+        "Explain desired composition"
+    ],
+    "Iterative Refinement": [
+        "Start with broad concepts, then refine",
+        "Make one change at a time",
+        "Use conversational language",
+        "Reference previous images in context",
+        "Build character consistency"
+    ]
+}
+
+LIMITATIONS = {
+    "Technical": [
+        "Model works best with a reasonable number of input images",
+        "No audio or video input support",
+        "Limited to certain languages (EN, es-MX, ja-JP, zh-CN, hi-IN)",
+        "All generated images include SynthID watermark",
+        "May not always follow exact number of output images requested"
+    ],
+    "Content": [
+        "Cannot upload images of children in EEA, CH, and UK",
+        "Subject to Google's usage policies",
+        "Cannot generate inappropriate or harmful content",
+        "May struggle with very specific brand logos or copyrighted material",
+        "Text rendering, while good, may not always be perfect"
+    ],
+    "Performance": [
+        "Higher latency compared to specialized image models",
+        "Token-based pricing can be expensive for high usage",
+        "May require multiple iterations for perfect results",
+        "Limited control over exact image dimensions",
+        "Processing time varies with complexity"
+    ]
+}
+
+TROUBLESHOOTING_ISSUES = {
+    "API Key Issues": {
+        "symptoms": ["Authentication errors", "Client not ready", "Access denied"],
+        "solutions": [
+            "Verify API key is correct",
+            "Check API key has proper permissions",
+            "Ensure key is set in environment variables or .env file",
+            "Try refreshing the client connection"
+        ]
+    },
+    "Poor Image Quality": {
+        "symptoms": ["Blurry images", "Incorrect details", "Wrong style"],
+        "solutions": [
+            "Make prompts more specific and detailed",
+            "Add professional photography terminology",
+            "Specify lighting and composition",
+            "Include quality indicators like 'high resolution', 'sharp focus'",
+            "Try iterative refinement in chat mode"
+        ]
+    },
+    "Slow Generation": {
+        "symptoms": ["Long wait times", "Timeouts", "Connection errors"],
+        "solutions": [
+            "Simplify complex prompts",
+            "Reduce number of images requested",
+            "Check internet connection",
+            "Try generating during off-peak hours",
+            "Use shorter, more focused prompts"
+        ]
+    },
+    "Unexpected Results": {
+        "symptoms": ["Wrong subject", "Missing elements", "Incorrect style"],
+        "solutions": [
+            "Be more explicit in descriptions",
+            "Use step-by-step instructions",
+            "Reference specific art styles or photographers",
+            "Use negative prompts (semantic negative)",
+            "Try multiple variations of the same prompt"
+        ]
+    }
+}
+
+
+def bullet_paragraphs(items) -> str:
+    """Join items into bullet paragraphs for a single markdown call"""
+    return "\n\n".join(f"• {item}" for item in items)
+
+
+@lru_cache(maxsize=None)
+def doc_expanders(section: str) -> tuple:
+    """Build the (label, markdown) expander pairs of a documentation section once"""
+    if section == "API Features":
+        return tuple(
+            (f"📋 {feature}",
+             f"**Description:** {details['description']}\n\n"
+             f"**Use Cases:** {', '.join(details['use_cases'])}\n\n"
+             f"**Example:** *{details['example']}*")
+            for feature, details in DOC_FEATURES.items()
+        )
+    if section == "Prompt Engineering":
+        return tuple((f"🔍 {category}", bullet_paragraphs(items)) for category, items in PROMPT_ELEMENTS.items())
+    if section == "Best Practices":
+        return tuple((f"💡 {category}", bullet_paragraphs(tips)) for category, tips in BEST_PRACTICES.items())
+    if section == "Limitations":
+        return tuple((f"📋 {category} Limitations", bullet_paragraphs(items)) for category, items in LIMITATIONS.items())
+    if section == "Troubleshooting":
+        return tuple(
+            (f"❓ {issue}",
+             f"**Symptoms:**\n\n{bullet_paragraphs(details['symptoms'])}\n\n"
+             f"**Solutions:**\n\n{bullet_paragraphs(details['solutions'])}")
+            for issue, details in TROUBLESHOOTING_ISSUES.items()
+        )
+    return ()
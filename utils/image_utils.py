@@ -1,11 +1,25 @@
 import streamlit as st
-from PIL import Image
+from PIL import Image, ImageOps
 import io
 import os
+import hashlib
+import logging
+import queue
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 import base64
 
+logger = logging.getLogger(__name__)
+
+try:
+    from blake3 import blake3 as fast_hash
+except ImportError:
+    from hashlib import sha1 as fast_hash
+
 
 def display_images(images: List[Image.Image], captions: Optional[List[str]] = None, width: Optional[int] = None):
     """Display a list of images in Streamlit"""
@@ -28,7 +42,7 @@ def display_images(images: List[Image.Image], captions: Optional[List[str]] = No
                 st.image(img, caption=caption, **image_kwargs)
 
 
-def display_response(response_data: dict):
+def display_response(response_data: dict, key_prefix: str = "download"):
     """Display API response with text and images"""
     if not response_data:
         st.error("No response data to display")
@@ -41,47 +55,88 @@ def display_response(response_data: dict):
     
     # Display images
     if response_data.get('images'):
-        display_images(response_data['images'])
+        # Encode each image once and share the bytes between preview and download
+        payloads = [download_payload(img) for img in response_data['images']]
+        display_images([img_bytes for img_bytes, _ in payloads])
+        
+        # One timestamp per response keeps a batch's file names consistent
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # Add download buttons for images
-        if len(response_data['images']) == 1:
-            img_bytes = image_to_bytes(response_data['images'][0])
+        if len(payloads) == 1:
+            img_bytes, ext = payloads[0]
             st.download_button(
                 label="Download Image",
                 data=img_bytes,
-                file_name=f"generated_image_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
-                mime="image/png"
+                file_name=f"generated_image_{timestamp}.{ext}",
+                mime=f"image/{ext}",
+                key=key_prefix
+            )
+        elif len(payloads) > 3:
+            st.download_button(
+                label=f"Download All {len(payloads)} Images",
+                data=zip_payloads(payloads, f"generated_image_{{index}}_{timestamp}"),
+                file_name=f"generated_images_{timestamp}.zip",
+                mime="application/zip",
+                key=key_prefix
             )
         else:
             st.write("**Download Images:**")
-            for i, img in enumerate(response_data['images']):
-                img_bytes = image_to_bytes(img)
+            for i, (img_bytes, ext) in enumerate(payloads):
                 st.download_button(
                     label=f"Download Image {i+1}",
                     data=img_bytes,
-                    file_name=f"generated_image_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
-                    mime="image/png",
-                    key=f"download_{i}"
+                    file_name=f"generated_image_{i+1}_{timestamp}.{ext}",
+                    mime=f"image/{ext}",
+                    key=f"{key_prefix}_{i}"
                 )
 
 
-def save_image(image: Image.Image, filename: str = None, folder: str = "generated_images") -> str:
-    """Save image to folder and return the path"""
-    if not os.path.exists(folder):
-        os.makedirs(folder)
-    
+# Folders already created in this process, so repeat saves skip the makedirs stat
+_KNOWN_DIRS = set()
+
+
+def _ensure_dir(folder: str):
+    """Create folder once per process"""
+    if folder not in _KNOWN_DIRS:
+        os.makedirs(folder, exist_ok=True)
+        _KNOWN_DIRS.add(folder)
+
+
+def _image_save_path(filename: Optional[str], folder: str) -> str:
+    """Create the folder if needed and build the path to save into"""
+    _ensure_dir(folder)
     if filename is None:
         filename = f"generated_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-    
-    filepath = os.path.join(folder, filename)
+    return os.path.join(folder, filename)
+
+
+def _save_to(image: Image.Image, filepath: str) -> str:
+    """Write image to filepath and return it"""
     image.save(filepath)
     return filepath
 
 
-def image_to_bytes(image: Image.Image, format: str = "PNG") -> bytes:
+@st.cache_resource(show_spinner=False)
+def _io_pool() -> ThreadPoolExecutor:
+    """Shared worker threads for image saves, one pool per process"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-save")
+
+
+def save_image(image: Image.Image, filename: str = None, folder: str = "generated_images") -> Future:
+    """Save image to folder in the background; the returned future resolves to the path"""
+    return _io_pool().submit(_save_to, image, _image_save_path(filename, folder))
+
+
+def save_image_sync(image: Image.Image, filename: str = None, folder: str = "generated_images") -> str:
+    """Save image to folder and return the path"""
+    return _save_to(image, _image_save_path(filename, folder))
+
+
+def image_to_bytes(image: Image.Image, format: str = "PNG", **save_kwargs) -> bytes:
     """Convert PIL Image to bytes"""
     img_bytes = io.BytesIO()
-    image.save(img_bytes, format=format)
+    image.save(img_bytes, format=format, **save_kwargs)
     return img_bytes.getvalue()
 
 
@@ -96,12 +151,45 @@ def resize_image(image: Image.Image, max_size: tuple = (1024, 1024)) -> Image.Im
     return image
 
 
+def prepare_for_api(image: Image.Image, max_edge: int = 1024) -> Image.Image:
+    """Downscale a copy of image so its long edge fits max_edge before upload"""
+    width, height = image.size
+    scale = max_edge / max(width, height)
+    if scale >= 1:
+        return image
+    return image.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.Resampling.LANCZOS)
+
+
+def fit_response_image(image, max_edge: int = 1024):
+    """Downscale a returned image past max_edge; images that fit are passed through untouched"""
+    image_bytes = getattr(image, 'image_bytes', None)
+    if image_bytes:
+        # Opening only reads the header, so in-range API images are never decoded
+        decoded = Image.open(io.BytesIO(image_bytes))
+        if max(decoded.size) <= max_edge:
+            return image
+        image = decoded
+    return prepare_for_api(image, max_edge)
+
+
+def gallery_thumbnail(image, max_edge: int = 512) -> bytes:
+    """Return a JPEG preview of a PIL Image or an API image part"""
+    image_bytes = getattr(image, 'image_bytes', None)
+    if image_bytes:
+        return make_thumbnail(image_bytes, max_edge)
+    return image_to_bytes(prepare_for_api(flatten_to_rgb(image), max_edge), format="JPEG", quality=85)
+
+
 def create_image_gallery(images: List[Image.Image], titles: Optional[List[str]] = None, columns: int = 3):
     """Create a gallery view of images"""
     if not images:
         st.info("No images to display")
         return
     
+    # Downscale and encode the previews in parallel rather than one by one inside st.image
+    with ThreadPoolExecutor(max_workers=min(4, len(images))) as executor:
+        thumbnails = list(executor.map(gallery_thumbnail, images))
+    
     # Calculate rows needed
     rows = (len(images) + columns - 1) // columns
     
@@ -112,7 +200,64 @@ def create_image_gallery(images: List[Image.Image], titles: Optional[List[str]]
             if idx < len(images):
                 with cols[col]:
                     title = titles[idx] if titles and idx < len(titles) else f"Image {idx + 1}"
-                    st.image(images[idx], caption=title, use_container_width=True)
+                    st.image(thumbnails[idx], caption=title, use_container_width=True)
+
+
+def flatten_to_rgb(image: Image.Image) -> Image.Image:
+    """Convert image to RGB, compositing transparency onto white"""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        rgb_image = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        # An RGBA/LA mask uses its alpha band in place, without splitting out every band
+        rgb_image.paste(image, mask=image)
+        return rgb_image
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def upload_digest(uploaded_file) -> str:
+    """Hash an uploaded file's bytes once per upload, reusing the digest on reruns"""
+    digests = st.session_state.setdefault('upload_digests', {})
+    digest = digests.get(uploaded_file.file_id)
+    if digest is None:
+        digest = digests[uploaded_file.file_id] = fast_hash(uploaded_file.getvalue()).hexdigest()
+    return digest
+
+
+# Formats the uploader accepts and the API returns; skips probing every other plugin
+DECODE_FORMATS = ('PNG', 'JPEG')
+
+
+# Cached functions are keyed on the digest; the underscored raw bytes are not hashed
+@st.cache_data(max_entries=32, ttl=24 * 60 * 60, show_spinner=False)
+def decode_image_bytes(digest: str, _raw: bytes) -> Image.Image:
+    """Decode uploaded bytes to an RGB PIL Image, cached across reruns"""
+    image = Image.open(io.BytesIO(_raw), formats=DECODE_FORMATS)
+    image.load()
+    # Apply camera orientation once, on the decoded pixels
+    ImageOps.exif_transpose(image, in_place=True)
+    image = flatten_to_rgb(image)
+    image.info['digest'] = digest
+    return image
+
+
+@st.cache_data(max_entries=64, ttl=24 * 60 * 60, show_spinner=False)
+def image_thumbnail(digest: str, _raw: bytes, max_edge: int = 768) -> bytes:
+    """Return a downscaled JPEG preview of uploaded bytes, cached across reruns"""
+    return make_thumbnail(_raw, max_edge)
+
+
+def make_thumbnail(raw: bytes, max_edge: int = 768) -> bytes:
+    """Return a downscaled JPEG preview of encoded image bytes"""
+    image = Image.open(io.BytesIO(raw), formats=DECODE_FORMATS)
+    # Let JPEGs decode at reduced scale before the Lanczos pass
+    image.draft('RGB', (max_edge, max_edge))
+    ImageOps.exif_transpose(image, in_place=True)
+    image = flatten_to_rgb(image)
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    return image_to_bytes(image, format="JPEG", quality=85)
 
 
 def validate_image_upload(uploaded_file) -> Optional[Image.Image]:
@@ -121,20 +266,29 @@ def validate_image_upload(uploaded_file) -> Optional[Image.Image]:
         return None
     
     try:
-        image = Image.open(uploaded_file)
-        # Convert to RGB if necessary (for PNG with transparency)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            rgb_image = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            rgb_image.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
-            image = rgb_image
-        return image
+        return decode_image_bytes(upload_digest(uploaded_file), uploaded_file.getvalue())
     except Exception as e:
         st.error(f"Error loading image: {str(e)}")
         return None
 
 
+def get_upload_thumbnails(key: str, max_edge: int = 768) -> List[bytes]:
+    """Get cached preview thumbnails for the files in an upload widget"""
+    uploaded_files = st.session_state.get(key)
+    if not uploaded_files:
+        return []
+    if not isinstance(uploaded_files, list):
+        uploaded_files = [uploaded_files]
+    
+    thumbnails = []
+    for uploaded_file in uploaded_files:
+        try:
+            thumbnails.append(image_thumbnail(upload_digest(uploaded_file), uploaded_file.getvalue(), max_edge))
+        except Exception:
+            continue
+    return thumbnails
+
+
 def create_before_after_view(before_image: Image.Image, after_image: Image.Image):
     """Create a before/after comparison view"""
     col1, col2 = st.columns(2)
@@ -163,10 +317,14 @@ def display_image_info(image: Image.Image):
     """Display image information in Streamlit"""
     info = get_image_info(image)
     
-    st.write(f"**Size:** {info['width']} x {info['height']} pixels")
-    st.write(f"**Mode:** {info['mode']}")
+    # One markdown element with hard line breaks instead of one element per line
+    lines = [
+        f"**Size:** {info['width']} x {info['height']} pixels",
+        f"**Mode:** {info['mode']}"
+    ]
     if info['format'] != 'Unknown':
-        st.write(f"**Format:** {info['format']}")
+        lines.append(f"**Format:** {info['format']}")
+    st.markdown("  \n".join(lines))
 
 
 def create_image_upload_widget(
@@ -215,23 +373,153 @@ def init_image_session_state():
         st.session_state.image_history = []
 
 
+HISTORY_DIR = os.path.join(tempfile.gettempdir(), "nano_banana_history")
+
+
+def build_history_entry(
+    img_bytes: bytes,
+    prompt: str,
+    operation: str,
+    timestamp: Optional[datetime] = None,
+    known_thumbnails: Optional[dict] = None
+) -> dict:
+    """Build the history entry for encoded image bytes with a small thumbnail"""
+    # The full image is stored on disk, named by content so repeats are written once
+    sha1 = hashlib.sha1(img_bytes).hexdigest()
+    path = os.path.join(HISTORY_DIR, f"{sha1}.png")
+    
+    # Repeats of an image already in the history share its thumbnail bytes
+    thumbnail = (known_thumbnails or {}).get(sha1)
+    if thumbnail is None:
+        thumbnail = make_thumbnail(img_bytes, 256)
+    
+    return {
+        'sha1': sha1,
+        'thumbnail': thumbnail,
+        'path': path,
+        'prompt': prompt,
+        'operation': operation,
+        'timestamp': timestamp or datetime.now()
+    }
+
+
 def add_to_image_history(image: Image.Image, prompt: str, operation: str = "generate"):
-    """Add image to session history"""
+    """Add image to session history, keeping only a thumbnail in session state"""
+    add_many_to_image_history([image], prompt, operation)
+
+
+def add_many_to_image_history(images: List[Union[Image.Image, bytes]], prompt: str, operation: str = "generate"):
+    """Add images, or their already-encoded bytes, to the session history; only the full-size files are written off the script thread"""
     if 'image_history' not in st.session_state:
         st.session_state.image_history = []
+    if not images:
+        return
     
-    st.session_state.image_history.append({
-        'image': image,
-        'prompt': prompt,
-        'operation': operation,
-        'timestamp': datetime.now()
-    })
+    history = st.session_state.image_history
+    known_thumbnails = {entry['sha1']: entry['thumbnail'] for entry in history}
+    timestamp = datetime.now()
+    
+    def build(image):
+        img_bytes = image if isinstance(image, bytes) else encoded_image_bytes(image)
+        return build_history_entry(img_bytes, prompt, operation, timestamp, known_thumbnails), img_bytes
+    
+    if len(images) == 1:
+        built = [build(images[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(4, len(images))) as executor:
+            built = list(executor.map(build, images))
+    
+    # Entries are visible on this run; read_history_image serves files still being written
+    history.extend(entry for entry, _ in built)
+    _ensure_history_worker()
+    for entry, img_bytes in built:
+        if entry['path'] not in _pending_writes:
+            _pending_writes[entry['path']] = img_bytes
+            _history_queue.put((entry['path'], img_bytes))
+
+
+# Encoded bytes of history files queued but not yet on disk, by path
+_pending_writes = {}
+_history_queue = queue.Queue()
+_history_worker_lock = threading.Lock()
+_history_worker = None
+
+
+def _ensure_history_worker():
+    """Start the background history writer once per process"""
+    global _history_worker
+    with _history_worker_lock:
+        if _history_worker is None or not _history_worker.is_alive():
+            _history_worker = threading.Thread(target=_write_history, name="image-history", daemon=True)
+            _history_worker.start()
+
+
+def _write_history():
+    """Write queued history images to disk, in queue order"""
+    while True:
+        path, img_bytes = _history_queue.get()
+        try:
+            _ensure_dir(HISTORY_DIR)
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(img_bytes)
+        except Exception:
+            logger.exception("Failed to store history image %s", path)
+        finally:
+            _pending_writes.pop(path, None)
+            _history_queue.task_done()
 
 
 def clear_image_history():
     """Clear image history"""
     if 'image_history' in st.session_state:
         st.session_state.image_history = []
+    st.session_state.history_page = 1
+
+
+def encoded_image_bytes(image) -> bytes:
+    """Get encoded bytes for a PIL Image or an API image part"""
+    image_bytes = getattr(image, 'image_bytes', None)
+    if image_bytes:
+        return image_bytes
+    return image_to_bytes(image)
+
+
+def download_payload(image) -> Tuple[bytes, str]:
+    """Get download bytes and file extension, encoding PIL Images as WebP"""
+    image_bytes = getattr(image, 'image_bytes', None)
+    if image_bytes:
+        # API images already arrive encoded; hand those bytes over untouched
+        return image_bytes, (getattr(image, 'mime_type', None) or "image/png").split("/")[-1]
+    return image_to_bytes(image, format="WEBP", quality=90, method=4), "webp"
+
+
+def zip_payloads(payloads: List[Tuple[bytes, str]], name_pattern: str) -> bytes:
+    """Bundle (bytes, extension) payloads into one uncompressed ZIP archive"""
+    buffer = io.BytesIO()
+    # The images are already compressed, so store them rather than deflate again
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for i, (img_bytes, ext) in enumerate(payloads, start=1):
+            archive.writestr(f"{name_pattern.format(index=i)}.{ext}", img_bytes)
+    return buffer.getvalue()
+
+
+HISTORY_PAGE_SIZE = 12
+
+
+def load_older_history():
+    """Show one more page of image history"""
+    st.session_state.history_page = st.session_state.get('history_page', 1) + 1
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def read_history_image(path: str) -> bytes:
+    """Read a stored history image; files are named by content so they never change"""
+    pending = _pending_writes.get(path)
+    if pending is not None:
+        return pending
+    with open(path, 'rb') as f:
+        return f.read()
 
 
 def display_image_history():
@@ -242,24 +530,39 @@ def display_image_history():
     
     st.subheader("Generated Images History")
     
-    for i, entry in enumerate(reversed(st.session_state.image_history)):
-        with st.expander(f"Image {len(st.session_state.image_history) - i} - {entry['operation'].title()} - {entry['timestamp'].strftime('%H:%M:%S')}"):
+    history = st.session_state.image_history
+    page = st.session_state.setdefault('history_page', 1)
+    visible = history[-HISTORY_PAGE_SIZE * page:]
+    
+    for i, entry in enumerate(reversed(visible)):
+        # Number entries from the oldest so widget keys stay put as new images arrive
+        number = len(history) - i
+        with st.expander(f"Image {number} - {entry['operation'].title()} - {entry['timestamp'].strftime('%H:%M:%S')}"):
             col1, col2 = st.columns([1, 2])
             
             with col1:
-                st.image(entry['image'], use_container_width=True)
+                st.image(entry['thumbnail'], use_container_width=True)
                 
-                # Download button
-                img_bytes = image_to_bytes(entry['image'])
-                st.download_button(
-                    label="Download",
-                    data=img_bytes,
-                    file_name=f"image_{i}_{entry['timestamp'].strftime('%Y%m%d_%H%M%S')}.png",
-                    mime="image/png",
-                    key=f"history_download_{i}"
-                )
+                # Only read the full image from disk once it is asked for
+                if st.toggle("View full", key=f"history_full_{entry['sha1']}_{number}"):
+                    try:
+                        img_bytes = read_history_image(entry['path'])
+                    except OSError:
+                        st.warning("Full image is no longer available")
+                    else:
+                        st.image(img_bytes, use_container_width=True)
+                        st.download_button(
+                            label="Download",
+                            data=img_bytes,
+                            file_name=f"image_{number}_{entry['timestamp'].strftime('%Y%m%d_%H%M%S')}.png",
+                            mime="image/png",
+                            key=f"history_download_{number}"
+                        )
             
             with col2:
                 st.write(f"**Operation:** {entry['operation'].title()}")
                 st.write(f"**Prompt:** {entry['prompt']}")
-                st.write(f"**Generated:** {entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}")
\ No newline at end of file
+                st.write(f"**Generated:** {entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    if len(visible) < len(history):
+        st.button(f"Load older ({len(history) - len(visible)} more)", on_click=load_older_history, key="history_load_older")
@@ -0,0 +1,178 @@
+import re
+from functools import lru_cache
+
+
+# Prompt tables for the app's tabs. They live in this module, rather than in
+# app.py which Streamlit re-executes on every rerun, so they are built once per process.
+
+# Text-to-image examples
+EXAMPLE_PROMPTS = {
+    "Photorealistic": "A photorealistic close-up of a nano banana on a marble kitchen counter, illuminated by soft natural light from a window, with water droplets on its surface",
+    "Artistic": "A minimalist digital art piece featuring a single nano banana floating in a vast white space, rendered in a modern abstract style",
+    "Fantasy": "A magical nano banana glowing with ethereal light in an enchanted forest, surrounded by fireflies and mystical fog",
+    "Product Shot": "A high-end product photograph of a nano banana on a sleek black surface with professional studio lighting and subtle reflections"
+}
+
+# Image editing examples
+EDIT_EXAMPLES = {
+    "Add Element": "Add a red hat to the person in the image",
+    "Change Background": "Change the background to a tropical beach scene",
+    "Change Style": "Transform this photo into a watercolor painting",
+    "Change Colors": "Change all blue elements to green",
+    "Remove Element": "Remove all text from this image",
+    "Change Expression": "Make the person smile more naturally"
+}
+
+# Multi-image composition examples
+COMPOSITION_EXAMPLES = {
+    "Subject Replacement": "Take the subject from image 1 and place them in the setting from image 2",
+    "Style Transfer": "Apply the artistic style from image 1 to the content of image 2",
+    "Background Swap": "Keep the subject from image 1 but use the background from image 2",
+    "Blend Elements": "Seamlessly blend elements from both images into a new scene",
+    "Product Mockup": "Place the product from image 1 onto the surface shown in image 2"
+}
+
+# Chat quick prompts
+QUICK_PROMPTS = (
+    "Create a simple landscape",
+    "Make it more colorful",
+    "Add some people",
+    "Change to nighttime",
+    "Make it more artistic",
+    "Add text saying 'Hello World'"
+)
+
+# Story, recipe and tutorial starters
+STORY_TEMPLATES = {
+    "Story": {
+        "Adventure": "A thrilling 8-part adventure story featuring a brave character exploring mysterious lands",
+        "Mystery": "A 6-part mystery story with clues and revelations leading to a surprising conclusion",
+        "Fantasy": "A magical 10-part fantasy tale with mythical creatures and enchanted worlds"
+    },
+    "Recipe": {
+        "Baking": "Step-by-step visual guide for baking delicious nano banana bread",
+        "Cooking": "How to prepare a gourmet nano banana dish from start to finish",
+        "Dessert": "Creating an elaborate nano banana dessert with artistic presentation"
+    },
+    "Tutorial": {
+        "Gardening": "Complete guide to growing nano bananas from seed to harvest",
+        "Art": "How to draw realistic nano bananas using different techniques",
+        "Science": "Scientific experiment showing nano banana properties and reactions"
+    }
+}
+
+# Advanced editing techniques
+ADVANCED_PROMPT_TEMPLATES = {
+    "Inpainting (Modify specific areas)": "In this image, change only {0} to {1}. Keep everything else exactly the same.",
+    "Outpainting (Extend image)": "Extend this image on the {0} by adding {1}. Maintain the same style and lighting.",
+    "Style Transfer": "Transform this image into the style of {0}. Preserve the original composition but render it with the characteristic techniques and aesthetics of {0}.",
+    "Detail Enhancement": "Enhance this image by {0}. Improve the overall quality while maintaining the original composition and subject matter.",
+    "Background Replacement": "Replace the background of this image with {0}. Keep the main subject exactly the same but place them in the new environment with appropriate lighting and shadows."
+}
+
+
+@lru_cache(maxsize=256)
+def build_advanced_prompt(technique: str, *args: str) -> str:
+    """Fill the prompt template for an advanced editing technique"""
+    return ADVANCED_PROMPT_TEMPLATES[technique].format(*args)
+
+
+# Prompt templates
+TEMPLATE_VAR_RE = re.compile(r'\{(\w+)\}')
+
+TEMPLATES_DB = {
+    "Photorealistic Scenes": {
+        "Portrait Photography": {
+            "template": "A photorealistic {shot_type} portrait of a {subject_description}, {expression}, shot with a {camera_specs}, {lighting_description}. Professional photography, sharp focus, {mood} mood.",
+            "example": "A photorealistic close-up portrait of a young woman with curly hair, gentle smile, shot with a 85mm lens at f/1.4, soft natural lighting from a large window. Professional photography, sharp focus, warm and inviting mood.",
+            "variables": ["shot_type", "subject_description", "expression", "camera_specs", "lighting_description", "mood"]
+        },
+        "Street Photography": {
+            "template": "A photorealistic street scene in {location}, {time_of_day}, featuring {main_subject}. Shot with {camera_style}, {weather_conditions}, {atmosphere}.",
+            "example": "A photorealistic street scene in Tokyo, golden hour, featuring people crossing a busy intersection. Shot with documentary photography style, light rain creating reflections, bustling urban atmosphere.",
+            "variables": ["location", "time_of_day", "main_subject", "camera_style", "weather_conditions", "atmosphere"]
+        }
+    },
+    "Artistic Styles": {
+        "Digital Art": {
+            "template": "A {style_type} digital artwork of {subject}, rendered in {art_technique}, with {color_palette} colors and {composition_style} composition. {additional_effects}.",
+            "example": "A cyberpunk digital artwork of a futuristic city, rendered in neon-lit vector art style, with electric blue and purple colors and dynamic diagonal composition. Glowing effects and particle systems.",
+            "variables": ["style_type", "subject", "art_technique", "color_palette", "composition_style", "additional_effects"]
+        },
+        "Traditional Art": {
+            "template": "A {medium} painting of {subject} in the style of {artist_style}, using {technique}, {color_approach}, painted on {canvas_type}.",
+            "example": "A watercolor painting of a mountain landscape in the style of Turner, using wet-on-wet technique, luminous atmospheric colors, painted on textured watercolor paper.",
+            "variables": ["medium", "subject", "artist_style", "technique", "color_approach", "canvas_type"]
+        }
+    },
+    "Product Photography": {
+        "E-commerce": {
+            "template": "A professional product photograph of {product}, shot on {background}, with {lighting_setup}. {camera_angle}, {focus_style}, commercial photography style.",
+            "example": "A professional product photograph of a luxury watch, shot on white seamless background, with three-point softbox lighting. 45-degree angle, macro focus on details, commercial photography style.",
+            "variables": ["product", "background", "lighting_setup", "camera_angle", "focus_style"]
+        },
+        "Lifestyle": {
+            "template": "A lifestyle product shot featuring {product} in {setting}, {usage_context}. Natural lighting, {mood}, {target_audience} aesthetic.",
+            "example": "A lifestyle product shot featuring wireless headphones in a modern coffee shop, person working on laptop. Natural window lighting, relaxed morning mood, young professional aesthetic.",
+            "variables": ["product", "setting", "usage_context", "mood", "target_audience"]
+        }
+    },
+    "Character Design": {
+        "Fantasy": {
+            "template": "A {character_type} character design, {physical_description}, wearing {clothing_armor}, holding {equipment}. {art_style} style, {pose}, {background_setting}.",
+            "example": "A female elf warrior character design, tall with silver hair and piercing green eyes, wearing ornate leather armor with gold trim, holding an enchanted bow. Fantasy art style, confident battle stance, mystical forest background.",
+            "variables": ["character_type", "physical_description", "clothing_armor", "equipment", "art_style", "pose", "background_setting"]
+        },
+        "Modern": {
+            "template": "A modern character design of {profession}, {age_appearance}, {distinctive_features}, wearing {outfit_style}. {art_medium} illustration, {personality_traits} expression, {setting}.",
+            "example": "A modern character design of a detective, middle-aged appearance, sharp eyes and graying beard, wearing a classic trench coat. Digital illustration, determined and thoughtful expression, city street at night.",
+            "variables": ["profession", "age_appearance", "distinctive_features", "outfit_style", "art_medium", "personality_traits", "setting"]
+        }
+    },
+    "Landscapes": {
+        "Natural": {
+            "template": "A {landscape_type} landscape during {time}, featuring {main_elements}. {weather_conditions}, {lighting_quality}, {photographic_style}.",
+            "example": "A mountain valley landscape during sunrise, featuring snow-capped peaks and alpine lake. Clear skies with morning mist, golden hour lighting, landscape photography with telephoto compression.",
+            "variables": ["landscape_type", "time", "main_elements", "weather_conditions", "lighting_quality", "photographic_style"]
+        },
+        "Urban": {
+            "template": "An urban {cityscape_type} of {city_description}, {architectural_style}, {time_period}. {viewing_angle}, {lighting_atmosphere}, {mood}.",
+            "example": "An urban skyline of a futuristic metropolis, sleek glass and steel architecture, cyberpunk aesthetic. Aerial drone perspective, neon-lit night atmosphere, dramatic and imposing mood.",
+            "variables": ["cityscape_type", "city_description", "architectural_style", "time_period", "viewing_angle", "lighting_atmosphere", "mood"]
+        }
+    },
+    "Text & Typography": {
+        "Logo Design": {
+            "template": "A {logo_style} logo for {business_type} called '{business_name}', featuring {design_elements}, {color_scheme} color scheme, {typography_style} typography.",
+            "example": "A minimalist logo for coffee shop called 'Bean & Brew', featuring a stylized coffee bean, warm brown and cream color scheme, modern sans-serif typography.",
+            "variables": ["logo_style", "business_type", "business_name", "design_elements", "color_scheme", "typography_style"]
+        },
+        "Typography Art": {
+            "template": "A typographic artwork with the text '{text_content}' in {font_style} style, {layout_approach}, {decorative_elements}, {background_treatment}.",
+            "example": "A typographic artwork with the text 'Create Magic' in hand-lettered calligraphy style, flowing curved layout, golden flourishes and swirls, dark gradient background.",
+            "variables": ["text_content", "font_style", "layout_approach", "decorative_elements", "background_treatment"]
+        }
+    }
+}
+
+# Split each template once into alternating literal / variable-name chunks
+# and build the strings its list entry and variable inputs render
+for category_templates in TEMPLATES_DB.values():
+    for template_name, template_data in category_templates.items():
+        template_data["tokens"] = tuple(TEMPLATE_VAR_RE.split(template_data["template"]))
+        template_data["variable_labels"] = tuple(
+            f"{variable.replace('_', ' ').title()}:" for variable in template_data["variables"]
+        )
+        template_data["variables_text"] = ", ".join(f"`{var}`" for var in template_data["variables"])
+        template_data["use_label"] = f"Use {template_name} Template"
+        template_data["use_key"] = f"use_template_{template_name}"
+
+
+@lru_cache(maxsize=256)
+def render_prompt(tokens: tuple, items: tuple) -> str:
+    """Fill a tokenized template's variables, leaving unfilled ones in place"""
+    values = dict(items)
+    return "".join(
+        values.get(token, f"{{{token}}}") if i % 2 else token
+        for i, token in enumerate(tokens)
+    )